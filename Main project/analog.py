@@ -0,0 +1,208 @@
+# analog.py — Block sampling of the ADC through its FIFO and DMA
+import micropython
+import rp2
+import utime
+from array import array
+from machine import ADC, mem32
+import config
+
+# Register addresses (RP2040 datasheet 4.9)
+ADC_BASE = 0x4004_C000
+ADC_CS = ADC_BASE + 0x00
+ADC_FCS = ADC_BASE + 0x08
+ADC_FIFO = ADC_BASE + 0x0C
+ADC_DIV = ADC_BASE + 0x10
+
+CS_EN = 1 << 0
+CS_START_MANY = 1 << 3
+CS_READY = 1 << 8
+CS_AINSEL_SHIFT = 12
+
+FCS_EN = 1 << 0
+FCS_DREQ_EN = 1 << 3
+FCS_EMPTY = 1 << 8
+FCS_UNDER = 1 << 10
+FCS_OVER = 1 << 11
+FCS_THRESH_SHIFT = 24
+
+DREQ_ADC = 36
+ADC_CLOCK = 48_000_000
+MIN_CYCLES = 96            # One conversion: 500 kS/s at 48 MHz
+FULL_SCALE = 4095          # 12-bit results
+
+
+@micropython.viper
+def _block_stats(buf: ptr16, n: int, out: ptr32):
+    """out = [min, max, sum, sum of squares low, sum of squares high]."""
+    vmin = uint(0xFFFF)
+    vmax = uint(0)
+    total = uint(0)
+    sq_lo = uint(0)
+    sq_hi = uint(0)
+    i = 0
+    while i < n:
+        x = uint(buf[i]) & 0xFFF
+        i += 1
+        if x < vmin:
+            vmin = x
+        if x > vmax:
+            vmax = x
+        total += x
+        sq = x * x
+        sq_lo += sq
+        if sq_lo < sq:
+            sq_hi += 1
+    out[0] = vmin
+    out[1] = vmax
+    out[2] = total
+    out[3] = sq_lo
+    out[4] = sq_hi
+
+
+@micropython.viper
+def _find_rising(buf: ptr16, start: int, stop: int, level: int) -> int:
+    """Index of the first sample at or above level after one below it, or -1."""
+    armed = False
+    i = start
+    while i < stop:
+        x = int(buf[i]) & 0xFFF
+        if x < level:
+            armed = True
+        elif armed:
+            return i
+        i += 1
+    return -1
+
+
+@micropython.viper
+def _decimate(buf: ptr16, start: int, n: int, out: ptr8, cols: int):
+    """out[2c], out[2c + 1] = min, max of column c's bucket as 8-bit levels."""
+    i = start
+    c = 0
+    while c < cols:
+        end = start + (c + 1) * n // cols
+        if end <= i:
+            end = i + 1      # Fewer samples than columns: repeat them
+        lo = 0xFFF
+        hi = 0
+        while i < end:
+            x = int(buf[i]) & 0xFFF
+            i += 1
+            if x < lo:
+                lo = x
+            if x > hi:
+                hi = x
+        out[2 * c] = lo >> 4
+        out[2 * c + 1] = hi >> 4
+        c += 1
+
+
+class AdcBlockSampler:
+    """Free-running ADC conversions moved by DMA into an array('H').
+
+    The ADC converts back to back at rate_hz, each result goes through its
+    FIFO and a DMA channel writes the block with no CPU involvement. The
+    block is then reduced with one viper pass, so short spikes and dips
+    show up in min/max instead of being averaged away by a slow Python loop.
+    """
+
+    def __init__(self, pin_num=config.ADC_PIN, samples=1024, rate_hz=500_000):
+        self.adc = ADC(pin_num)   # Configures the pad and enables the ADC
+        self.channel = pin_num - 26
+        self.buf = array("H", bytes(2 * samples))
+        self._out = array("I", bytes(4 * 5))
+        self._trace = bytearray(0)
+        self._dma = None
+        self.set_rate(rate_hz)
+
+    def set_rate(self, rate_hz):
+        cycles = max(ADC_CLOCK // rate_hz, MIN_CYCLES)
+        self.rate_hz = ADC_CLOCK // cycles
+        self._div = (cycles - 1) << 8
+
+    def _stop_adc(self):
+        mem32[ADC_CS] = CS_EN | self.channel << CS_AINSEL_SHIFT
+        while not mem32[ADC_CS] & CS_READY:
+            pass
+        while not mem32[ADC_FCS] & FCS_EMPTY:
+            mem32[ADC_FIFO]
+        # FIFO off again so ADC.read_u16() keeps working
+        mem32[ADC_FCS] = FCS_UNDER | FCS_OVER
+        mem32[ADC_DIV] = 0
+
+    def sample(self, timeout_ms=50):
+        """Fill the buffer with one block; return the number of samples."""
+        if self._dma is None:
+            self._dma = rp2.DMA()
+        n = len(self.buf)
+
+        self._stop_adc()
+        mem32[ADC_DIV] = self._div
+        mem32[ADC_FCS] = FCS_EN | FCS_DREQ_EN | 1 << FCS_THRESH_SHIFT | FCS_UNDER | FCS_OVER
+        self._dma.config(
+            read=ADC_FIFO,
+            write=self.buf,
+            count=n,
+            ctrl=self._dma.pack_ctrl(
+                size=1,
+                inc_read=False,
+                inc_write=True,
+                treq_sel=DREQ_ADC,
+            ),
+            trigger=True,
+        )
+        mem32[ADC_CS] = CS_EN | self.channel << CS_AINSEL_SHIFT | CS_START_MANY
+
+        start_time = utime.ticks_ms()
+        while self._dma.active():
+            if utime.ticks_diff(utime.ticks_ms(), start_time) > timeout_ms:
+                self._dma.active(0)
+                break
+
+        self._stop_adc()
+        return n - self._dma.count
+
+    def envelope(self):
+        """Sample one block; return (mean, min, max, peak_to_peak, rms) in volts."""
+        n = self.sample()
+        if not n:
+            return 0.0, 0.0, 0.0, 0.0, 0.0
+        out = self._out
+        _block_stats(self.buf, n, out)
+
+        scale = config.VREF / FULL_SCALE
+        vmin = out[0] * scale
+        vmax = out[1] * scale
+        mean = out[2] / n * scale
+        rms = ((out[4] << 32 | out[3]) / n) ** 0.5 * scale
+        return mean, vmin, vmax, vmax - vmin, rms
+
+    def trace(self, cols=128):
+        """Sample one block and decimate half of it into a min/max trace.
+
+        The window starts at the first rising crossing of the block's
+        mid-level in the first half, so a periodic signal stays put on
+        screen. Returns (trace, vmin, vmax, window_us); trace holds a min
+        and max byte per column (0-255 spans 0-VREF) and is reused.
+        """
+        n = self.sample()
+        if len(self._trace) != 2 * cols:
+            self._trace = bytearray(2 * cols)
+        if n < 2:
+            return self._trace, 0.0, 0.0, 0
+
+        out = self._out
+        _block_stats(self.buf, n, out)
+        window = n // 2
+        start = _find_rising(self.buf, 0, n - window, (out[0] + out[1]) // 2)
+        if start < 0:
+            start = 0
+        _decimate(self.buf, start, window, self._trace, cols)
+
+        scale = config.VREF / FULL_SCALE
+        return self._trace, out[0] * scale, out[1] * scale, window * 1_000_000 // self.rate_hz
+
+    def close(self):
+        if self._dma is not None:
+            self._dma.close()
+            self._dma = None
@@ -0,0 +1,634 @@
+# capture.py — PIO + DMA logic capture into a RAM ring buffer
+import rp2
+import uasyncio
+import uctypes
+import utime
+from array import array
+from machine import Pin
+import config
+from pio_based_helpers import claim_sm, release_sm
+
+# Register addresses (RP2040 datasheet 2.5 / 3.7)
+DMA_BASE = 0x5000_0000
+DMA_CH_STRIDE = 0x40
+DMA_AL2_WRITE_ADDR_TRIG = 0x2C
+PIO_BASE = (0x5020_0000, 0x5030_0000)
+PIO_RXF0 = 0x20
+DREQ_PIO_RX0 = (4, 12)
+TIMER_RAWL = 0x4005_4028       # Free-running microsecond timer (ticks_us)
+TREQ_UNPACED = 0x3F
+
+# -----------------------------------------------------------------------------
+# Sampler programs
+# -----------------------------------------------------------------------------
+# One `in` of `channels` adjacent pins per state machine cycle, so the SM
+# clock is the sample rate. Samples are shifted in from the left and
+# autopushed every 32 bits: a word holds 32 // channels samples, oldest in
+# the low bits, and channel c of sample k is bit k * channels + c.
+CHANNEL_COUNTS = (1, 2, 4, 8)
+_programs = {}
+
+def _sampler(channels, trigger):
+    """Return the sampler, optionally waiting for an edge (0 falling, 1 rising)
+    on the first channel before sampling starts."""
+    key = (channels, trigger)
+    if key not in _programs:
+        if trigger is None:
+            @rp2.asm_pio(in_shiftdir=rp2.PIO.SHIFT_RIGHT, autopush=True,
+                         push_thresh=32, fifo_join=rp2.PIO.JOIN_RX)
+            def sample_pins():
+                wrap_target()
+                in_(pins, channels)
+                wrap()
+        else:
+            level = trigger
+
+            @rp2.asm_pio(in_shiftdir=rp2.PIO.SHIFT_RIGHT, autopush=True,
+                         push_thresh=32, fifo_join=rp2.PIO.JOIN_RX)
+            def sample_pins():
+                wait(1 - level, pin, 0)
+                wait(level, pin, 0)       # Trigger edge
+                wrap_target()
+                in_(pins, channels)
+                wrap()
+        _programs[key] = sample_pins
+    return _programs[key]
+
+
+class LogicCapture:
+    """Continuous capture of 1-8 adjacent pins into a ring of 32-bit words.
+
+    A data DMA channel moves words from the PIO RX FIFO into the ring; when
+    it reaches the end it chains to a control channel that writes the ring's
+    start address back into the data channel's trigger register, so capture
+    wraps around with no CPU involvement. The CPU only sees one IRQ per lap.
+
+    Given `words`, arm() instead makes a one-shot capture: the data channel
+    stops after exactly that many words and wait() returns, so nothing after
+    the trigger is overwritten however late the caller looks.
+    """
+
+    def __init__(self, pin_num=config.INPUT_PIN, channels=1, depth_words=4096, sm_id=0):
+        if channels not in CHANNEL_COUNTS:
+            raise ValueError("channels must be 1, 2, 4 or 8")
+        # `in_(pins, n)` reads pin_num upwards; make sure they are all inputs
+        self.pins = [Pin(pin_num + i, Pin.IN) for i in range(channels)]
+        self.pin = self.pins[0]
+        self.channels = channels
+        self.samples_per_word = 32 // channels
+        self.sm_id = sm_id
+        self.depth = depth_words
+        self.ring = array("I", bytes(4 * depth_words))
+        self.ring_addr = uctypes.addressof(self.ring)
+        self._start_addr = array("I", [self.ring_addr])
+
+        self.sm = None
+        self.rate_hz = 0
+        self.wraps = 0
+        self.oneshot = False
+        self._done = None
+        self._data = None
+        self._ctrl = None
+
+    def _on_wrap(self, dma):
+        if self.oneshot:
+            self._done.set()
+        else:
+            self.wraps += 1
+
+    def arm(self, rate_hz, trigger=None, words=None):
+        """Start sampling at rate_hz, optionally after a trigger edge.
+
+        With words (up to depth) the capture stops once that many words
+        are written instead of wrapping around the ring.
+        """
+        self.stop()
+        self.rate_hz = rate_hz
+        self.wraps = 0
+        self.oneshot = words is not None
+        if self.oneshot:
+            self._done = uasyncio.ThreadSafeFlag()
+
+        self.sm = claim_sm(
+            self.sm_id, _sampler(self.channels, trigger),
+            freq=rate_hz,
+            in_base=self.pin,
+        )
+
+        pio = self.sm_id // 4
+        index = self.sm_id % 4
+        if self._data is None:
+            self._data = rp2.DMA()
+            self._ctrl = rp2.DMA()
+            self._data.irq(self._on_wrap)
+        self._data.config(
+            read=PIO_BASE[pio] + PIO_RXF0 + 4 * index,
+            write=self.ring,
+            count=min(words, self.depth) if self.oneshot else self.depth,
+            ctrl=self._data.pack_ctrl(
+                size=2,
+                inc_read=False,
+                inc_write=True,
+                treq_sel=DREQ_PIO_RX0[pio] + index,
+                # Chaining to itself means no chaining
+                chain_to=self._data.channel if self.oneshot else self._ctrl.channel,
+                irq_quiet=False,
+            ),
+        )
+        self._ctrl.config(
+            read=self._start_addr,
+            write=DMA_BASE + DMA_CH_STRIDE * self._data.channel + DMA_AL2_WRITE_ADDR_TRIG,
+            count=1,
+            ctrl=self._ctrl.pack_ctrl(
+                size=2,
+                inc_read=False,
+                inc_write=False,
+                chain_to=self._ctrl.channel,
+            ),
+        )
+
+        self._data.active(1)
+        self.sm.active(1)
+
+    def stop(self):
+        """Stop sampling; the ring keeps its contents for read()."""
+        if self.sm is None:
+            return
+        self.sm.active(0)
+        self._data.active(0)
+        self._ctrl.active(0)
+        release_sm(self.sm_id)
+        self.sm = None
+
+    def close(self):
+        self.stop()
+        if self._data is not None:
+            self._data.close()
+            self._ctrl.close()
+            self._data = None
+            self._ctrl = None
+
+    def running(self):
+        return self.sm is not None
+
+    async def wait(self):
+        """Sleep until a one-shot capture has written all its words."""
+        await self._done.wait()
+
+    def write_index(self):
+        """Index of the next ring word the DMA will write."""
+        if self._data is None:
+            return 0
+        index = (self._data.write - self.ring_addr) // 4
+        if index >= self.depth and not self.oneshot:
+            return 0     # Between the end of a lap and the control reload
+        return index
+
+    def words_captured(self):
+        """Total words written since arm(), including overwritten ones."""
+        return self.wraps * self.depth + self.write_index()
+
+    def samples_captured(self):
+        return self.words_captured() * self.samples_per_word
+
+    def read(self):
+        """Return (older, newer) memoryviews of the ring in capture order.
+
+        Stop the capture first for a consistent snapshot. Use the helpers
+        below to pick samples and channels out of the views.
+        """
+        view = memoryview(self.ring)
+        index = self.write_index()
+        if self.wraps == 0:
+            return view[0:0], view[:index]
+        return view[index:], view[:index]
+
+
+# -----------------------------------------------------------------------------
+# Transition-encoded capture
+# -----------------------------------------------------------------------------
+# Instead of sampling, the PIO counts cycles between edges and pushes one
+# word per edge, so depth scales with edge count rather than time. Words
+# alternate LOW, HIGH, LOW... starting with the LOW segment after arming (it
+# is ~0 if the input was already HIGH). Both loops take 2 cycles per count;
+# the fixed cycles spent pushing are added back by the decoder.
+@rp2.asm_pio(fifo_join=rp2.PIO.JOIN_RX)
+def edge_intervals():
+    wrap_target()
+    mov(x, invert(null))
+    label("low")
+    jmp(pin, "rose")
+    jmp(x_dec, "low")          # Count while LOW
+    label("rose")
+    mov(isr, invert(x))        # LOW segment length
+    push(block)
+    mov(x, invert(null))
+    label("high")
+    jmp(pin, "still_high")
+    jmp("fell")
+    label("still_high")
+    jmp(x_dec, "high")         # Count while HIGH
+    label("fell")
+    mov(isr, invert(x))        # HIGH segment length
+    push(block)
+    wrap()
+
+INTERVAL_LOOP_CYCLES = 2
+LOW_EXTRA_CYCLES = 5           # fell -> push -> low loop
+HIGH_EXTRA_CYCLES = 4          # rose -> push -> high loop
+FIRST_EXTRA_CYCLES = 1         # arm -> first pin test
+TRANSFER_COUNT = 0xFFFF_FFFF   # Words before the ring DMA stops (over an hour at 1 Mbaud)
+
+
+class TransitionCapture:
+    """Edge-interval capture of one pin into a ring of words.
+
+    A single DMA channel drains the RX FIFO into `words`. Its write address
+    wraps in hardware (ring_size, as in GlitchDetector), so capture runs on
+    indefinitely, and the transfer count gives the exact number of words
+    written with no lap IRQ to race against. Word n is words[n % depth];
+    the reader must keep within depth words of edges_captured().
+    """
+
+    def __init__(self, pin_num=config.INPUT_PIN, depth_words=2048, sm_id=7):
+        if depth_words & (depth_words - 1):
+            raise ValueError("depth_words must be a power of two")
+        self.pin = Pin(pin_num, Pin.IN)
+        self.sm_id = sm_id
+        self.depth = depth_words
+
+        # The DMA write ring must be aligned to its size
+        ring_bytes = 4 * depth_words
+        self._ring_bits = ring_bytes.bit_length() - 1
+        self._mem = array("I", bytes(2 * ring_bytes))
+        addr = uctypes.addressof(self._mem)
+        start = ((addr + ring_bytes - 1) & ~(ring_bytes - 1)) - addr
+        self.words = memoryview(self._mem)[start // 4:start // 4 + depth_words]
+
+        self.sm = None
+        self._dma = None
+        self._last_us = 0
+        self._elapsed_us = 0
+
+    def arm(self):
+        self.stop()
+        self.sm = claim_sm(
+            self.sm_id, edge_intervals,
+            freq=config.PIO_FREQ,
+            in_base=self.pin,
+            jmp_pin=self.pin,
+        )
+
+        pio = self.sm_id // 4
+        index = self.sm_id % 4
+        if self._dma is None:
+            self._dma = rp2.DMA()
+        self._dma.config(
+            read=PIO_BASE[pio] + PIO_RXF0 + 4 * index,
+            write=self.words,
+            count=TRANSFER_COUNT,
+            ctrl=self._dma.pack_ctrl(
+                size=2,
+                inc_read=False,
+                inc_write=True,
+                ring_size=self._ring_bits,
+                ring_sel=True,
+                treq_sel=DREQ_PIO_RX0[pio] + index,
+            ),
+            trigger=True,
+        )
+        self.sm.active(1)
+        self._last_us = utime.ticks_us()
+        self._elapsed_us = 0
+
+    def stop(self):
+        if self.sm is None:
+            return
+        self.sm.active(0)
+        self._dma.active(0)
+        release_sm(self.sm_id)
+        self.sm = None
+
+    def close(self):
+        self.stop()
+        if self._dma is not None:
+            self._dma.close()
+            self._dma = None
+
+    def running(self):
+        return self.sm is not None
+
+    def elapsed_ns(self):
+        """Time since arming on the EdgeStream time base.
+
+        Stamped just after the SM starts, so it never runs ahead of the
+        edges: read it before edges_captured() and every edge up to it is
+        there. Accumulated per call, so calls must be under ~9 minutes apart
+        (half the ticks_us period).
+        """
+        now = utime.ticks_us()
+        self._elapsed_us += utime.ticks_diff(now, self._last_us)
+        self._last_us = now
+        return self._elapsed_us * 1000
+
+    def edges_captured(self):
+        """Number of words (edges) written since arm(), overwritten ones included."""
+        if self._dma is None:
+            return 0
+        return TRANSFER_COUNT - self._dma.count
+
+    def exhausted(self):
+        """True once the DMA has run through its whole transfer count."""
+        return self.sm is not None and not self._dma.active()
+
+
+class EdgeStream:
+    """Turns edge-interval words into (time_ns, new_level) edges.
+
+    Keeps its position between calls, so a capture that is still running
+    can be decoded as it fills. Word n is read from words[n % len(words)],
+    so a TransitionCapture ring is followed across laps. Times are relative
+    to arming.
+    """
+
+    def __init__(self, cycle_ns=config.CLOCK_NS):
+        self.cycle_ns = cycle_ns
+        self.index = 0
+        self.t = 0
+        self.level = 0
+
+    def edges(self, words, stop):
+        """Lazily yield the edges of words self.index up to stop."""
+        depth = len(words)
+        while self.index < stop:
+            if self.index == 0:
+                extra = FIRST_EXTRA_CYCLES
+            elif self.level == 0:
+                extra = LOW_EXTRA_CYCLES
+            else:
+                extra = HIGH_EXTRA_CYCLES
+            self.t += (words[self.index % depth] * INTERVAL_LOOP_CYCLES + extra) * self.cycle_ns
+            self.level ^= 1
+            self.index += 1
+            yield self.t, self.level
+
+
+def decode_edges(words, stop=None, cycle_ns=config.CLOCK_NS):
+    """Lazily yield (time_ns, new_level) for each captured edge."""
+    if stop is None:
+        stop = len(words)
+    return EdgeStream(cycle_ns).edges(words, stop)
+
+
+def decode_samples(words, sample_ns, stop=None, cycle_ns=config.CLOCK_NS):
+    """Lazily expand edge intervals back into one level per sample_ns.
+
+    Ends at the last captured edge.
+    """
+    level = 0
+    t = 0
+    for edge_t, new_level in decode_edges(words, stop, cycle_ns):
+        while t < edge_t:
+            yield level
+            t += sample_ns
+        level = new_level
+
+
+# -----------------------------------------------------------------------------
+# Glitch capture
+# -----------------------------------------------------------------------------
+# A pulse of `level` counts as a glitch if it ends before the threshold loop
+# (2 cycles per count, loaded from the setup word) runs out. For each glitch
+# the PIO decrements its count in x and pushes one word: the low 24 bits of
+# x above the 8-bit loops left. Two DMA channels chained to each other then
+# store that word and the microsecond timer into small rings, so the count
+# and the most recent glitches are kept with no CPU involvement at all.
+_glitch_programs = {}
+
+def _glitch_program(level):
+    if level not in _glitch_programs:
+        @rp2.asm_pio()
+        def glitch_detect():
+            pull(block)               # Threshold loops
+            mov(x, invert(null))
+            wrap_target()
+            label("top")
+            wait(1 - level, pin, 0)
+            wait(level, pin, 0)       # Pulse starts
+            mov(y, osr)
+            label("pulse")
+            if level:
+                jmp(pin, "high")
+                jmp("glitch")         # Fell again: the pulse ended
+                label("high")
+                jmp(y_dec, "pulse")
+            else:
+                jmp(pin, "glitch")    # Rose again: the pulse ended
+                jmp(y_dec, "pulse")
+            jmp("top")                # Threshold reached: not a glitch
+            label("glitch")
+            jmp(x_dec, "record")      # Count
+            label("record")
+            in_(x, 24)
+            in_(y, 8)
+            push(noblock)
+            wrap()
+        _glitch_programs[level] = glitch_detect
+    return _glitch_programs[level]
+
+GLITCH_LOOP_CYCLES = 2
+GLITCH_EXTRA_CYCLES = 2        # Edge detect -> first pin test
+
+
+class GlitchDetector:
+    """Counts pulses of level shorter than max_cycles PIO cycles (SM7).
+
+    Besides the running count, the last `depth` glitches are kept with
+    their width and ticks_us timestamp. The shortest width is taken from
+    those rings each time they are read, so it covers every glitch as long
+    as fewer than `depth` arrive between reads.
+    """
+
+    def __init__(self, pin_num=config.INPUT_PIN, max_cycles=25, level=1, depth=8, sm_id=7):
+        self.pin = Pin(pin_num, Pin.IN)
+        self.level = level
+        self.sm_id = sm_id
+        self.depth = depth
+        self.set_threshold(max_cycles)
+
+        # DMA write rings must be aligned to their size: allocate room for
+        # an aligned pair (widths, then timestamps)
+        ring_bytes = 4 * depth
+        self._ring_bits = ring_bytes.bit_length() - 1
+        self._mem = array("I", bytes(3 * ring_bytes))
+        addr = uctypes.addressof(self._mem)
+        self._widths_addr = (addr + ring_bytes - 1) & ~(ring_bytes - 1)
+        self._widths = (self._widths_addr - addr) // 4
+        self._times = self._widths + depth
+
+        self.sm = None
+        self.shortest_ns = None
+        self._total = 0
+        self._last24 = 0
+        self._data = None
+        self._stamp = None
+
+    def set_threshold(self, max_cycles):
+        """Pulses shorter than about max_cycles (up to 512) count as glitches."""
+        self.max_cycles = max_cycles
+        loops = (max_cycles - GLITCH_EXTRA_CYCLES) // GLITCH_LOOP_CYCLES
+        self._loops = min(max(loops, 1), 255)
+
+    def start(self):
+        if self.sm is not None:
+            return
+        # An all-ones word reads as "no glitches yet"
+        for i in range(self.depth):
+            self._mem[self._widths + i] = 0xFFFFFFFF
+            self._mem[self._times + i] = 0
+        self.shortest_ns = None
+        self._total = 0
+        self._last24 = 0
+
+        self.sm = claim_sm(
+            self.sm_id, _glitch_program(self.level),
+            freq=config.PIO_FREQ,
+            in_base=self.pin,
+            jmp_pin=self.pin,
+        )
+
+        pio = self.sm_id // 4
+        index = self.sm_id % 4
+        if self._data is None:
+            self._data = rp2.DMA()
+            self._stamp = rp2.DMA()
+        self._data.config(
+            read=PIO_BASE[pio] + PIO_RXF0 + 4 * index,
+            write=self._widths_addr,
+            count=1,
+            ctrl=self._data.pack_ctrl(
+                size=2,
+                inc_read=False,
+                inc_write=True,
+                ring_size=self._ring_bits,
+                ring_sel=True,
+                treq_sel=DREQ_PIO_RX0[pio] + index,
+                chain_to=self._stamp.channel,
+            ),
+            trigger=True,
+        )
+        self._stamp.config(
+            read=TIMER_RAWL,
+            write=self._widths_addr + 4 * self.depth,
+            count=1,
+            ctrl=self._stamp.pack_ctrl(
+                size=2,
+                inc_read=False,
+                inc_write=True,
+                ring_size=self._ring_bits,
+                ring_sel=True,
+                treq_sel=TREQ_UNPACED,
+                chain_to=self._data.channel,
+            ),
+        )
+        self.sm.put(self._loops)
+        self.sm.active(1)
+
+    def stop(self):
+        if self.sm is None:
+            return
+        self.sm.active(0)
+        self._data.active(0)
+        self._stamp.active(0)
+        release_sm(self.sm_id)
+        self.sm = None
+
+    def close(self):
+        self.stop()
+        if self._data is not None:
+            self._data.close()
+            self._stamp.close()
+            self._data = None
+            self._stamp = None
+
+    def _newest_slot(self):
+        # Slot before the next one the data channel will write
+        return ((self._data.write - self._widths_addr) // 4 - 1) % self.depth
+
+    def count(self):
+        """Glitches since start().
+
+        The PIO keeps 24 bits of count; they are extended here, so reads
+        must be less than 2**24 glitches apart.
+        """
+        if self.sm is None:
+            return self._total
+        word = self._mem[self._widths + self._newest_slot()]
+        count24 = (0xFFFFFF - (word >> 8)) & 0xFFFFFF
+        self._total += (count24 - self._last24) & 0xFFFFFF
+        self._last24 = count24
+        return self._total
+
+    def _width_ns(self, loops_left):
+        loops = self._loops - loops_left
+        return (loops * GLITCH_LOOP_CYCLES + GLITCH_EXTRA_CYCLES) * config.CLOCK_NS
+
+    def recent(self):
+        """Return [(ticks_us, width_ns), ...] of the last glitches, newest first."""
+        if self._data is None:
+            return []
+        mem = self._mem
+        depth = self.depth
+        stored = min(self.count(), depth)
+        newest = self._newest_slot()
+        result = []
+        for k in range(stored):
+            i = (newest - k) % depth
+            width = self._width_ns(mem[self._widths + i] & 0xFF)
+            if self.shortest_ns is None or width < self.shortest_ns:
+                self.shortest_ns = width
+            result.append((mem[self._times + i] & 0x3FFFFFFF, width))
+        return result
+
+
+# -----------------------------------------------------------------------------
+# Unpacking helpers
+# -----------------------------------------------------------------------------
+# These index straight into the captured words (array or memoryview) and
+# never copy the buffer.
+
+def sample(words, n, channels=1):
+    """Return sample n with all channels packed into its low bits."""
+    per_word = 32 // channels
+    shift = (n % per_word) * channels
+    return (words[n // per_word] >> shift) & ((1 << channels) - 1)
+
+
+def channel_bit(words, n, channel, channels=1):
+    """Return the level (0 or 1) of one channel at sample n."""
+    per_word = 32 // channels
+    shift = (n % per_word) * channels + channel
+    return (words[n // per_word] >> shift) & 1
+
+
+def iter_samples(words, channels=1, start=0, stop=None):
+    """Yield packed samples in order, one word lookup per 32 // channels."""
+    per_word = 32 // channels
+    mask = (1 << channels) - 1
+    if stop is None:
+        stop = len(words) * per_word
+
+    n = start
+    while n < stop:
+        word = words[n // per_word] >> ((n % per_word) * channels)
+        end = min(stop, (n // per_word + 1) * per_word)
+        while n < end:
+            yield word & mask
+            word >>= channels
+            n += 1
+
+
+def iter_channel(words, channel, channels=1, start=0, stop=None):
+    """Yield the levels of one channel in order."""
+    for value in iter_samples(words, channels, start, stop):
+        yield (value >> channel) & 1
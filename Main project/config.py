@@ -2,25 +2,38 @@
 # Pin mappings for your SCL/SDA labeled TFT (ST7735)
 
 INPUT_PIN = 15         # Logic probe input
-ADC_PIN = 26           # Analog voltage input which is not yet used
+ADC_PIN = 26           # Analog input for the voltage and scope modes
 MODE_BUTTON_PIN = 16   # Button to cycle display modes
 EDGE_BUTTON_PIN = 19
 
 # TFT display wiring (adjusted to match my setup)
 SCL = 13           
 SDA = 12          
-I2C_FREQ = 50000      # 50 kHz
+I2C_FREQ = 400000     # 400 kHz, the SH1106 fast-mode limit
+
+# Logic capture: CAPTURE_CHANNELS adjacent inputs starting at CAPTURE_BASE_PIN
+CAPTURE_BASE_PIN = 0
+CAPTURE_CHANNELS = 4   # 1, 2, 4 or 8
+SUMP_SERVER = False    # Serve captures to sigrok/PulseView over USB serial (opt-in:
+                       # Ctrl-C is off while a client is connected)
 
 #Rotary Encoder Pins
 PSH_BTN = 7
 A_PIN = 8
 B_PIN = 9
+ENCODER_DETENT_STEPS = 4   # Quadrature transitions per click
+ENCODER_ACCEL_MS = 80      # Clicks closer than this count double...
+ENCODER_FAST_MS = 30       # ...and closer than this count triple
+ENCODER_POLL_MS = 10       # Safe mode (no IRQs): knob and button poll interval
 
 # Reference voltage for analog measurement
 VREF = 3.3
 INPUT_THRESHOLD_LOW = 0.8  # Volts
 INPUT_THRESHOLD_HIGH = 2.0  # Volts
 MAX_INPUT_VOLTAGE = 3.3     # Volts
+ADC_RATE_HZ = 500_000       # Free-running ADC rate for the voltage mode
+ADC_BLOCK_SAMPLES = 1024    # Samples reduced per voltage reading
+SCOPE_FRAME_MS = 100        # Scope redraw interval (10 fps)
 
 TEST_PWM = True  # Set to True to enable test PWM output on pin 17 for testing purposes
 
@@ -30,8 +43,30 @@ TEST_PWM = True  # Set to True to enable test PWM output on pin 17 for testing p
 PIO_FREQ = 125_000_000    # 125MHz (1 clock cycle = 8ns)
 DEFAULT_TIMEOUT_MS = 1000  # Timeout after a full second
 CLOCK_NS = 8              # Time for one clock cycle at 125MHz
+RECIPROCAL_MAX_HZ = 1_000_000  # Use period timing below this, gated counting above
 
 DEBOUNCE_US = 50
+EDGE_RING_SIZE = 256   # Edges kept by logic.py (power of two)
+COUNT_EDGES = "rising"   # Edge counter: "rising", "falling" or "both"
+EDGE_GLITCH_CYCLES = 0   # Ignore pulses shorter than this many PIO cycles
+GLITCH_MAX_CYCLES = 25   # Glitch mode: pulses under 25 cycles (200 ns)
+GLITCH_LEVEL = 1         # Glitch mode: 1 = HIGH pulses, 0 = LOW pulses
+
+# UART decode mode (input on INPUT_PIN)
+UART_BAUD = 115200
+UART_DATA_BITS = 8
+UART_PARITY = None     # None, "even" or "odd"
+UART_STOP_BITS = 1
+
+ENGINE_INTERVAL_MS = 20   # Pause between measurements on core 1
+
+# Display rendering: frames are drawn when a value changes or input arrives
+RENDER_MIN_FRAME_MS = 50        # Frame rate cap (20 fps)
+RENDER_REFRESH_MS = 1000        # Redraw at least this often while active
+RENDER_IDLE_AFTER_MS = 10_000   # Nothing new for this long: go idle
+RENDER_IDLE_MS = 5000           # Redraw interval while idle
+MODE_BANNER_MS = 300            # Keep the mode name up after switching
+INLINE_MEASURE_MS = 300         # Safe mode: frame (and measurement) interval
 
 # Safe Mode ON = disables risky features (IRQs, timers, etc.)
 SAFE_MODE = False
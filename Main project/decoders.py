@@ -0,0 +1,298 @@
+# decoders.py — Protocol decoders over captured edge timings
+#
+# Pure Python with no hardware imports, so the same code runs on the probe
+# (live, fed from capture.EdgeStream or logic.py edge events) and on a host
+# for offline dumps. Decoders keep a few ints of state and yield results as
+# they complete, so memory stays bounded however long the input is.
+
+# Error flags in decoded frames
+FRAMING_ERROR = 1
+PARITY_ERROR = 2
+
+NS = 1_000_000_000   # Edge times in nanoseconds (capture.EdgeStream)
+US = 1_000_000       # Edge times in microseconds (logic.py ticks_us)
+
+
+# -----------------------------------------------------------------------------
+# Async serial (UART)
+# -----------------------------------------------------------------------------
+class UartDecoder:
+    """Decode async serial frames from (time, level) edges.
+
+    Bits are not oversampled: each frame is timed from its start-bit falling
+    edge, and the level at each bit centre is simply the level set by the
+    last edge before it. Work is per edge and per bit, which is what keeps
+    1 Mbaud affordable on the RP2040.
+
+    decode() yields (start_time, value, errors) tuples, where errors is a
+    mask of FRAMING_ERROR / PARITY_ERROR. State carries over between calls,
+    so edges can be fed in chunks as they are captured.
+    """
+
+    IDLE = -1
+
+    def __init__(self, baud, data_bits=8, parity=None, stop_bits=1, time_scale=NS):
+        if parity not in (None, "even", "odd"):
+            raise ValueError("parity must be None, 'even' or 'odd'")
+        self.baud = baud
+        self.data_bits = data_bits
+        self.parity = parity
+        self.stop_bits = stop_bits
+        self.time_scale = time_scale
+
+        # Start + data + parity + stop bits sampled per frame
+        self.frame_bits = 1 + data_bits + (1 if parity else 0) + stop_bits
+        self.reset()
+
+    def reset(self):
+        self.level = 1           # Line idles HIGH
+        self.bit = self.IDLE     # Index of the next bit to sample
+        self.frame_start = 0
+        self.value = 0
+        self.ones = 0
+        self.errors = 0
+
+    def _sample_time(self, bit):
+        # Centre of bit `bit` in the frame, in integer time units
+        return self.frame_start + (2 * bit + 1) * self.time_scale // (2 * self.baud)
+
+    def _take(self, level):
+        """Record one sampled bit; return a finished frame or None."""
+        bit = self.bit
+        self.bit += 1
+
+        if bit == 0:
+            if level:
+                # Start bit did not hold: a glitch, not a frame
+                self.bit = self.IDLE
+            return None
+
+        if bit <= self.data_bits:
+            self.value |= level << (bit - 1)
+            self.ones += level
+        elif self.parity and bit == self.data_bits + 1:
+            self.ones += level
+            odd = self.ones & 1
+            if odd != (self.parity == "odd"):
+                self.errors |= PARITY_ERROR
+        elif not level:
+            self.errors |= FRAMING_ERROR
+
+        if self.bit < self.frame_bits:
+            return None
+
+        frame = (self.frame_start, self.value, self.errors)
+        self.bit = self.IDLE
+        return frame
+
+    def advance(self, t):
+        """Yield frames completed by sampling every bit centre before t.
+
+        Call with the current time once every edge up to it has been fed,
+        so the last frame of a burst is not held back until the next edge.
+        """
+        while self.bit != self.IDLE and self._sample_time(self.bit) < t:
+            frame = self._take(self.level)
+            if frame is not None:
+                yield frame
+
+    def decode(self, edges):
+        """Consume (time, level) edges, yielding frames as they complete."""
+        for t, level in edges:
+            yield from self.advance(t)
+
+            if self.bit == self.IDLE and self.level and not level:
+                # Falling edge on an idle line: start bit
+                self.frame_start = t
+                self.bit = 0
+                self.value = 0
+                self.ones = 0
+                self.errors = 0
+            self.level = level
+
+    def flush(self):
+        """Finish a frame still in progress, assuming the line holds its level."""
+        while self.bit != self.IDLE:
+            frame = self._take(self.level)
+            if frame is not None:
+                yield frame
+
+
+def decode_uart(edges, baud, data_bits=8, parity=None, stop_bits=1, time_scale=NS):
+    """Decode a complete edge list (e.g. an offline dump) into frames."""
+    decoder = UartDecoder(baud, data_bits, parity, stop_bits, time_scale)
+    yield from decoder.decode(edges)
+    yield from decoder.flush()
+
+
+# -----------------------------------------------------------------------------
+# Multi-channel captures (capture.LogicCapture words)
+# -----------------------------------------------------------------------------
+class PackedDecoder:
+    """Walk packed capture words and pass changes on watched channels on.
+
+    Words hold 32 // channels samples, oldest in the low bits (see
+    capture.py). A word in which the watched channels never change is
+    skipped with a single comparison, so idle bus time costs one step per
+    word rather than per sample. Subclasses implement _on_change(n, old, new)
+    and return an event tuple or None; n is the sample index since the
+    decoder was created, so divide by the sample rate for time.
+    """
+
+    def __init__(self, channels, watched):
+        self.channels = channels
+        self.per_word = 32 // channels
+        self.sample_mask = (1 << channels) - 1
+        self.mask = 0
+        for ch in watched:
+            self.mask |= 1 << ch
+
+        # A word whose samples all equal v is v * self.repeat
+        self.repeat = 0
+        for k in range(self.per_word):
+            self.repeat |= 1 << (k * channels)
+        self.word_mask = self.mask * self.repeat
+
+        self.n = 0
+        self.last = None
+
+    def feed(self, words):
+        """Decode one chunk of words (array or memoryview), yielding events."""
+        channels = self.channels
+        per_word = self.per_word
+        sample_mask = self.sample_mask
+        mask = self.mask
+        n = self.n
+        last = self.last
+
+        for word in words:
+            if last is not None and word & self.word_mask == (last & mask) * self.repeat:
+                n += per_word
+                continue
+
+            for _ in range(per_word):
+                value = word & sample_mask
+                word >>= channels
+                if last is not None and (value ^ last) & mask:
+                    event = self._on_change(n, last, value)
+                    if event is not None:
+                        self.n = n
+                        self.last = value
+                        yield event
+                last = value
+                n += 1
+
+        self.n = n
+        self.last = last
+
+    def _on_change(self, n, old, new):
+        raise NotImplementedError
+
+
+class I2CDecoder(PackedDecoder):
+    """I2C from SCL/SDA channels.
+
+    Events: ("start", n), ("stop", n), ("address", n, addr7, read, ack) and
+    ("data", n, byte, ack). A repeated START is reported as "start".
+    """
+
+    def __init__(self, channels, scl=0, sda=1):
+        super().__init__(channels, (scl, sda))
+        self.scl = 1 << scl
+        self.sda = 1 << sda
+        self.bits = -1    # Bits of the current byte, -1 when not in a transfer
+        self.byte = 0
+        self.first = True
+
+    def _on_change(self, n, old, new):
+        scl_was = old & self.scl
+        scl = new & self.scl
+
+        if scl_was and scl:
+            # SDA moved while SCL was high: START or STOP condition
+            if new & self.sda:
+                self.bits = -1
+                return ("stop", n)
+            self.bits = 0
+            self.byte = 0
+            self.first = True
+            return ("start", n)
+
+        if scl and not scl_was and self.bits >= 0:
+            # Rising SCL: sample SDA
+            bit = 1 if new & self.sda else 0
+            if self.bits < 8:
+                self.byte = (self.byte << 1) | bit
+                self.bits += 1
+                return None
+
+            # Ninth clock: ACK (SDA low) or NAK
+            ack = not bit
+            byte = self.byte
+            self.bits = 0
+            self.byte = 0
+            if self.first:
+                self.first = False
+                return ("address", n, byte >> 1, byte & 1, ack)
+            return ("data", n, byte, ack)
+
+        return None
+
+
+class SPIDecoder(PackedDecoder):
+    """SPI from SCK/MOSI and optional MISO/CS channels.
+
+    cpol/cpha select the mode; bits are sampled on the leading clock edge
+    for cpha=0 and the trailing edge for cpha=1. CS is active low; pass
+    cs=None for a permanently selected device. Events: ("select", n),
+    ("data", n, mosi, miso) per word and ("deselect", n). miso is None if
+    no MISO channel is given.
+    """
+
+    def __init__(self, channels, sck=0, mosi=1, miso=None, cs=None,
+                 cpol=0, cpha=0, bits=8, msb_first=True):
+        watched = [sck] + ([cs] if cs is not None else [])
+        super().__init__(channels, watched)
+        self.sck = 1 << sck
+        self.mosi = 1 << mosi
+        self.miso = None if miso is None else 1 << miso
+        self.cs = None if cs is None else 1 << cs
+        self.bits = bits
+        self.msb_first = msb_first
+
+        # Clock level right after the sampling edge
+        self.sample_level = self.sck if cpol == cpha else 0
+        self.selected = cs is None
+        self._reset_word()
+
+    def _reset_word(self):
+        self.count = 0
+        self.mosi_word = 0
+        self.miso_word = 0
+
+    def _on_change(self, n, old, new):
+        if self.cs is not None and (old ^ new) & self.cs:
+            self._reset_word()
+            self.selected = not new & self.cs
+            return ("select", n) if self.selected else ("deselect", n)
+
+        if not self.selected or not (old ^ new) & self.sck:
+            return None
+        if new & self.sck != self.sample_level:
+            return None
+
+        mosi = 1 if new & self.mosi else 0
+        miso = 1 if self.miso is not None and new & self.miso else 0
+        if self.msb_first:
+            self.mosi_word = (self.mosi_word << 1) | mosi
+            self.miso_word = (self.miso_word << 1) | miso
+        else:
+            self.mosi_word |= mosi << self.count
+            self.miso_word |= miso << self.count
+        self.count += 1
+
+        if self.count < self.bits:
+            return None
+        event = ("data", n, self.mosi_word, self.miso_word if self.miso is not None else None)
+        self._reset_word()
+        return event
@@ -2,6 +2,7 @@
 from machine import I2C, Pin
 import sh1106
 import config
+from glyph_cache import TextCache
 
 # I2C init
 i2c = I2C(
@@ -15,102 +16,305 @@ i2c = I2C(
 oled = sh1106.SH1106_I2C(128, 64, i2c)
 
 
+# Set once refresh_task() runs; frames are then pushed in the background
+_async_refresh = False
+
+
+async def refresh_task():
+    """Run the background display refresher (add to the uasyncio tasks)."""
+    global _async_refresh
+    _async_refresh = True
+    await oled.refresh_task()
+
+
+def present():
+    """Send the framebuffer, in the background when refresh_task() runs."""
+    if _async_refresh:
+        oled.request_show()
+    else:
+        oled.show()
+
+
 # Colors for monochrome display
 WHITE = 1
 BLACK = 0
 
+# Rendered glyphs at 1x-3x, blitted instead of re-rasterized
+glyphs = TextCache()
+
 # --- Helpers ---
 def clear():
     """Clear the entire display buffer."""
+    global _active
+    _active = None
     oled.fill(BLACK)
-    oled.show()
+    present()
 
 def header(title):
     """Draw a highlighted header bar with title."""
     # Draw filled top bar (inverted: white background, black text)
     oled.fill_rect(0, 0, 128, 16, WHITE)
-    oled.text(title, 2, 4, BLACK)   # black text on white background
+    glyphs.draw(oled, title, 2, 4, BLACK)   # black text on white background
 
-def center_text(text, y, color=WHITE):
+def center_text(text, y, color=WHITE, scale=1):
     """Center text horizontally."""
-    x = (128 - len(text) * 8) // 2
-    oled.text(text, x, y, color)
+    x = (128 - len(text) * 8 * scale) // 2
+    glyphs.draw(oled, text, x, y, color, scale)
+
+def glyph_stats():
+    """Return (hits, misses, entries) of the text render cache."""
+    return glyphs.stats()
 
 def line(y):
     """Draw a horizontal line at given y (white)."""
     oled.hline(0, y, 128, WHITE)
 
+# --- Retained-mode layout ---
+# Each screen is declared once as static chrome (header, divider) plus a list
+# of fields. Updating a screen redraws only the fields whose value changed
+# and marks just their rows dirty, so a steady reading costs no I2C traffic.
+
+_active = None   # Screen whose chrome is currently on the display
+
+class Field:
+    """A box on a screen that is redrawn only when its value changes."""
+
+    def __init__(self, x, y, w, h=None, center=False, draw=None, scale=1):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = 8 * scale if h is None else h
+        self.center = center
+        self.scale = scale   # 2 or 3 for large digits, shrinks to fit
+        self.draw = draw     # draw(field, value) for non-text fields
+        self.value = None
+
+    def update(self, value):
+        if value == self.value:
+            return False
+        self.value = value
+
+        oled.fill_rect(self.x, self.y, self.w, self.h, BLACK)
+        if self.draw:
+            self.draw(self, value)
+        else:
+            scale = self.scale
+            while scale > 1 and len(value) * 8 * scale > self.w:
+                scale -= 1
+            x = self.x
+            if self.center:
+                x += (self.w - len(value) * 8 * scale) // 2
+            glyphs.draw(oled, value, x, self.y, WHITE, scale)
+        oled.mark_dirty(self.y, self.h)
+        return True
+
+
+class Screen:
+    """Static chrome drawn once, plus the fields that change."""
+
+    def __init__(self, title, fields, divider=True):
+        self.title = title
+        self.fields = fields
+        self.divider = divider
+
+    def draw_chrome(self):
+        oled.fill(BLACK)
+        header(self.title)
+        if self.divider:
+            line(20)
+        for field in self.fields:
+            field.value = None
+        oled.mark_dirty(0, oled.height)
+
+    def update(self, *values):
+        """Show values (one per field); only changed fields are redrawn."""
+        global _active
+
+        changed = False
+        if _active is not self:
+            self.draw_chrome()
+            _active = self
+            changed = True
+
+        for i in range(len(values)):
+            if self.fields[i].update(values[i]):
+                changed = True
+
+        if changed:
+            present()
+
+
+def text_field(y, scale=1):
+    """Full-width field with centred text at row y."""
+    return Field(0, y, 128, center=True, scale=scale)
+
+
+def _draw_duty_bar(field, percent):
+    oled.rect(field.x, field.y, field.w, field.h, WHITE)
+    oled.fill_rect(field.x, field.y, percent, field.h, WHITE)
+
+
+MODE_SCREEN = Screen("MODE", [text_field(30)], divider=False)
+LOGIC_SCREEN = Screen("LOGIC PROBE", [text_field(35, 3)], divider=False)
+LOGIC_DETAIL_SCREEN = Screen("LOGIC PROBE", [text_field(25, 2), text_field(48)], divider=False)
+FREQUENCY_SCREEN = Screen("FREQUENCY", [text_field(40, 2)])
+FREQUENCY_DETAIL_SCREEN = Screen("FREQUENCY", [
+    text_field(28, 2),
+    Field(0, 52, 64),
+    Field(64, 52, 64),
+])
+PULSE_SCREEN = Screen("PULSE WIDTH", [text_field(40, 2)])
+DUTY_SCREEN = Screen("DUTY CYCLE", [
+    Field(14, 35, 100, draw=_draw_duty_bar),
+    Field(50, 48, 78),
+    Field(70, 56, 58),
+])
+# Column heading plus min/avg/max/jitter rows, HIGH and LOW side by side
+PULSE_STATS_SCREEN = Screen("PULSE WIDTH", [
+    Field(0, 19, 128),
+    Field(0, 28, 128),
+    Field(0, 37, 128),
+    Field(0, 46, 128),
+    Field(0, 55, 128),
+], divider=False)
+def _draw_trace(field, trace):
+    # One vertical line per column from its min to its max level
+    bottom = field.y + field.h - 1
+    h = field.h
+    x = field.x
+    for c in range(0, 2 * field.w, 2):
+        top = bottom - trace[c + 1] * h // 256
+        oled.vline(x, top, bottom - trace[c] * h // 256 - top + 1, WHITE)
+        x += 1
+
+# A fully changed page is about 149 bytes on the bus (cursor write plus 8
+# chunks of address + 17 bytes), ~3.4 ms at 400 kHz. The label (pages 2-3)
+# and the four trace pages then take ~20 ms, well inside a 100 ms frame.
+# At 50 kHz the same frame would take ~160 ms.
+SCOPE_SCREEN = Screen("SCOPE", [
+    text_field(20),
+    Field(0, 32, 128, h=32, draw=_draw_trace),
+], divider=False)
+GLITCH_SCREEN = Screen("GLITCHES", [
+    text_field(22, 2),
+    text_field(40),
+    text_field(48),
+    text_field(56),
+])
+EDGE_TIMES_SCREEN = Screen("EDGE TIMES", [
+    Field(5, 24, 123),
+    Field(5, 33, 123),
+    Field(5, 46, 123),
+    Field(5, 55, 123),
+])
+NUMBER_SCREEN = Screen("NUMBER", [text_field(35)], divider=False)
+VOLTAGE_SCREEN = Screen("VOLTAGE", [
+    text_field(23, 2),
+    text_field(41),
+    text_field(49),
+    text_field(57),
+])
+EDGE_COUNT_SCREEN = Screen("EDGE COUNT", [text_field(38)])
+UART_SCREEN = Screen("UART", [
+    text_field(24),
+    text_field(34),
+    text_field(44),
+    Field(0, 56, 128),
+])
+
+def format_frequency(freq_hz):
+    if freq_hz >= 1000:
+        return "{:.2f} kHz".format(freq_hz / 1000)
+    return "{} Hz".format(int(freq_hz))
+
 # --- Display Modes with Optimized Updates ---
 def show_mode(mode):
-    oled.fill(BLACK)
-    header("MODE")
-    center_text(mode.upper(), 30)
-    oled.show()
+    MODE_SCREEN.update(mode.upper())
 
 def show_logic(level):
-    # Clear only the content area (below header)
-    oled.fill_rect(0, 16, 128, 48, BLACK)
-    header("LOGIC PROBE")
     status = "HIGH" if level else "LOW"
-    # Use white text; optionally invert for emphasis
-    center_text(status, 35, WHITE)
-    oled.show()
+    LOGIC_SCREEN.update(status)
 
 def show_frequency(freq_hz):
-    oled.fill_rect(0, 16, 128, 48, BLACK)
-    header("FREQUENCY")
-    line(20)
-    if freq_hz >= 1000:
-        txt = "{:.2f} kHz".format(freq_hz / 1000)
-    else:
-        txt = "{} Hz".format(int(freq_hz))
-    center_text(txt, 40)
-    oled.show()
+    FREQUENCY_SCREEN.update(format_frequency(freq_hz))
 
 def show_pulse(width_us):
-    oled.fill_rect(0, 16, 128, 48, BLACK)
-    header("PULSE WIDTH")
-    line(20)
-    txt = "{} us".format(int(width_us))
-    center_text(txt, 40)
-    oled.show()
+    PULSE_SCREEN.update("{} us".format(int(width_us)))
+
+def _short_us(us):
+    """Format a width in at most 6 characters."""
+    if us < 10:
+        return "{:.3f}".format(us)
+    if us < 100:
+        return "{:.2f}".format(us)
+    if us < 1000:
+        return "{:.1f}".format(us)
+    return "{:.0f}".format(us)
+
+def show_pulse_stats(high, low):
+    """high/low are (count, min, mean, max, stdev) in us."""
+    rows = [("us", "HIGH", "LOW")]
+    for label, i in (("min", 1), ("avg", 2), ("max", 3), ("jit", 4)):
+        if high[0] and low[0]:
+            rows.append((label, _short_us(high[i]), _short_us(low[i])))
+        else:
+            rows.append((label, "-", "-"))
+    PULSE_STATS_SCREEN.update(*["{:<4}{:>6}{:>6}".format(*row) for row in rows])
 
 def show_duty_cycle(duty_percent, freq_hz):
-    oled.fill_rect(0, 16, 128, 48, BLACK)
-    header("DUTY CYCLE")
-    line(20)
-    # Bar graph outline
+    # Bar graph, percent text and frequency text (bottom right)
     bar_width = min(max(int(duty_percent), 0), 100)
-    oled.rect(14, 35, 100, 8, WHITE)
-
-    # Filled portion
-    oled.fill_rect(14, 35, bar_width, 8, WHITE)
-    # Percent text
-    oled.text("{:.1f}%".format(duty_percent), 50, 48, WHITE)
-    # Frequency text (smaller, bottom right)
-    oled.text("{:.0f}Hz".format(freq_hz), 70, 56, WHITE)
-    oled.show()
-
-def show_rise_fall(rise_ns, fall_ns):
-    oled.fill_rect(0, 16, 128, 48, BLACK)
-    header("EDGE TIMES")
-    line(20)
-    oled.text("Rise: {}ns".format(int(rise_ns)), 5, 30, WHITE)
-    oled.text("Fall: {}ns".format(int(fall_ns)), 5, 45, WHITE)
-    oled.show()
+    DUTY_SCREEN.update(
+        bar_width,
+        "{:.1f}%".format(duty_percent),
+        "{:.0f}Hz".format(freq_hz),
+    )
+
+def _short_ns(ns):
+    if ns < 10_000:
+        return "{}ns".format(int(ns))
+    if ns < 10_000_000:
+        return "{:.1f}us".format(ns / 1000)
+    return "{:.1f}ms".format(ns / 1_000_000)
+
+def show_high_low(high_ns, low_ns, high_sd=None, low_sd=None):
+    """HIGH (rise to fall) and LOW times, with jitter when given."""
+    EDGE_TIMES_SCREEN.update(
+        "High: {}".format(_short_ns(high_ns)),
+        "" if high_sd is None else "  sd {}".format(_short_ns(high_sd)),
+        "Low:  {}".format(_short_ns(low_ns)),
+        "" if low_sd is None else "  sd {}".format(_short_ns(low_sd)),
+    )
+
+def show_scope(trace, vmin, vmax, window_us):
+    """trace holds a min and max byte per column, 0-255 spanning 0-VREF."""
+    SCOPE_SCREEN.update(
+        "{:.1f}-{:.1f}V {}us".format(vmin, vmax, window_us),
+        trace,
+    )
+
+def _short_age(ms):
+    if ms < 1000:
+        return "{}ms".format(ms)
+    if ms < 60_000:
+        return "{:.1f}s".format(ms / 1000)
+    return "{}m".format(ms // 60_000)
+
+def show_glitches(count, shortest_ns, recent, max_ns):
+    """recent is [(age_ms, width_ns), ...], newest first; two are listed."""
+    if shortest_ns is None:
+        limits = "none <{}ns".format(max_ns)
+    else:
+        limits = "min {}ns <{}ns".format(shortest_ns, max_ns)
+    rows = ["{}ns {} ago".format(width, _short_age(age)) for age, width in recent[:2]]
+    rows += [""] * (2 - len(rows))
+    GLITCH_SCREEN.update(str(count), limits, rows[0], rows[1])
 
 def show_number(num):
-    oled.fill_rect(0, 16, 128, 48, BLACK)
-    header("NUMBER")
-    center_text(str(num), 35)
-    oled.show()
+    NUMBER_SCREEN.update(str(num))
 
 def show_logic_detail(level, direction=None, age_ms=None):
-    oled.fill_rect(0, 16, 128, 48, BLACK)
-    header("LOGIC PROBE")
-
     status = "HIGH" if level else "LOW"
-    center_text(status, 25, WHITE)
 
     if direction is None:
         edge_text = "EDGE: none"
@@ -119,43 +323,43 @@ def show_logic_detail(level, direction=None, age_ms=None):
     else:
         edge_text = "EDGE: {} {}ms".format(direction.upper(), age_ms)
 
-    center_text(edge_text, 48, WHITE)
-    oled.show()
-
+    LOGIC_DETAIL_SCREEN.update(status, edge_text)
 
-def show_voltage(voltage, state):
-    oled.fill_rect(0, 16, 128, 48, BLACK)
-    header("VOLTAGE")
-    line(20)
 
-    center_text("{:.2f} V".format(voltage), 32)
-    center_text(state, 50)
-    oled.show()
+def show_voltage(voltage, state, envelope=None):
+    """envelope is (mean, min, max, peak_to_peak, rms) from an ADC block."""
+    if envelope is None:
+        span = ripple = ""
+    else:
+        _, vmin, vmax, p2p, rms = envelope
+        span = "{:.2f}..{:.2f} V".format(vmin, vmax)
+        ripple = "pp {:.2f} rms {:.2f}".format(p2p, rms)
+    VOLTAGE_SCREEN.update("{:.2f} V".format(voltage), span, ripple, state)
 
 
 def show_edge_count(count):
-    oled.fill_rect(0, 16, 128, 48, BLACK)
-    header("EDGE COUNT")
-    line(20)
-
-    center_text("{} edges".format(count), 38)
-    oled.show()
+    EDGE_COUNT_SCREEN.update("{} edges".format(count))
 
 
 def show_frequency_detail(freq_hz, min_hz=None, max_hz=None):
-    oled.fill_rect(0, 16, 128, 48, BLACK)
-    header("FREQUENCY")
-    line(20)
-
-    if freq_hz >= 1000:
-        main = "{:.2f} kHz".format(freq_hz / 1000)
+    if min_hz is not None and max_hz is not None:
+        low = "L:{:.0f}".format(min_hz)
+        high = "H:{:.0f}".format(max_hz)
     else:
-        main = "{} Hz".format(int(freq_hz))
+        low = high = ""
 
-    center_text(main, 28)
+    FREQUENCY_DETAIL_SCREEN.update(format_frequency(freq_hz), low, high)
 
-    if min_hz is not None and max_hz is not None:
-        oled.text("L:{:.0f}".format(min_hz), 0, 52, WHITE)
-        oled.text("H:{:.0f}".format(max_hz), 64, 52, WHITE)
 
-    oled.show()
\ No newline at end of file
+def show_uart(data, count, errors, baud):
+    """Last bytes in hex (two rows) and ASCII, plus counters."""
+    hex_bytes = ["{:02X}".format(b) for b in data]
+    half = len(hex_bytes) // 2
+    ascii_text = "".join(chr(b) if 32 <= b < 127 else "." for b in data)
+
+    UART_SCREEN.update(
+        " ".join(hex_bytes[:half]),
+        " ".join(hex_bytes[half:]),
+        ascii_text,
+        "{} N:{} E:{}".format(baud, count, errors),
+    )
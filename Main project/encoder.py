@@ -1,51 +1,115 @@
 from machine import Pin
 import utime
+import uasyncio
+import config
+from pio_based_helpers import claim_sm, encoder, ENCODER_PIO_FREQ
 
 
 class RotaryEncoder:
+    """Quadrature rotary encoder counted in the background by SM3.
 
-    def __init__(self, pin_clk, pin_dt, pin_sw):
+    The PIO keeps the position itself, so bounces cancel out and no step is
+    lost while core 0 is busy; the CPU reads the totals when it wants them.
+    Pin IRQs on A and the button only wake wait(); with use_irq=False (safe
+    mode) wait() polls instead. Clicks in quick succession count double or
+    triple.
+    """
 
+    def __init__(self, pin_clk, pin_dt, pin_sw, sm_id=3, use_irq=True):
         self.clk = Pin(pin_clk, Pin.IN, Pin.PULL_UP)
         self.dt = Pin(pin_dt, Pin.IN, Pin.PULL_UP)
-        self.sw = Pin(pin_sw, Pin.IN, Pin.PULL_UP) 
-
-        self.last_clk = self.clk.value()
-
-        self.last_event_time = utime.ticks_ms()
-
-        # adjust if needed
-        self.debounce_ms = 5
+        self.sw = Pin(pin_sw, Pin.IN, Pin.PULL_UP)
+        self.use_irq = use_irq
+
+        self.presses = 0
+        self._clicked = 0            # Half steps already turned into clicks
+        self._last_click = utime.ticks_ms()
+        self._last_dir = 0
+        self._last_press = self._last_click
+        self._sw_level = 1
+        self._read_presses = 0
+        self._flag = uasyncio.ThreadSafeFlag()
+
+        self.sm = claim_sm(
+            sm_id, encoder,
+            freq=ENCODER_PIO_FREQ,
+            in_base=self.clk,
+            jmp_pin=self.dt,
+        )
+        self.sm.exec("mov(x, invert(null))")
+        self.sm.exec("mov(y, invert(null))")
+        self.sm.active(1)
+
+        if use_irq:
+            self.clk.irq(trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING, handler=self._wake)
+            self.sw.irq(trigger=Pin.IRQ_FALLING, handler=self._on_button)
+
+    def _wake(self, pin):
+        self._flag.set()
+
+    def _press(self):
+        now = utime.ticks_ms()
+        if utime.ticks_diff(now, self._last_press) < 50:
+            return   # Contact bounce
+        self._last_press = now
+        self.presses += 1
+
+    def _on_button(self, pin):
+        self._press()
+        self._flag.set()
+
+    def half_steps(self):
+        """Net edges of A since start (positive clockwise)."""
+        sm = self.sm
+        sm.exec("mov(isr, x)")
+        sm.exec("push(noblock)")
+        sm.exec("mov(isr, y)")
+        sm.exec("push(noblock)")
+        cw = sm.get()
+        ccw = sm.get()
+        return ccw - cw      # Both count down from 2**32 - 1
+
+    async def wait(self):
+        """Sleep until the knob turns or the button is pressed (or a poll interval)."""
+        if self.use_irq:
+            await self._flag.wait()
+        else:
+            await uasyncio.sleep_ms(config.ENCODER_POLL_MS)
 
     def read(self):
-
-        current_clk = self.clk.value()
-
-        # detect ONLY falling edge
-        if self.last_clk == 1 and current_clk == 0:
-
-            now = utime.ticks_ms()
-
-            # debounce
-            if utime.ticks_diff(now, self.last_event_time) > self.debounce_ms:
-
-                self.last_event_time = now
-
-                # sample DT after tiny settle delay
-                utime.sleep_us(200)
-
-                if self.dt.value():
-                    result = 1
-                else:
-                    result = -1
-
-                self.last_clk = current_clk
-
-                return result
-
-        self.last_clk = current_clk
-
-        return 0
+        """Clicks since the last call (positive clockwise), acceleration included."""
+        per_click = max(config.ENCODER_DETENT_STEPS // 2, 1)
+        moved = self.half_steps() - self._clicked
+        clicks = abs(moved) // per_click
+        if not clicks:
+            return 0
+        direction = 1 if moved > 0 else -1
+        self._clicked += direction * clicks * per_click
+
+        # Velocity: clicks close together in the same direction count more
+        now = utime.ticks_ms()
+        interval = utime.ticks_diff(now, self._last_click)
+        step = 1
+        if direction == self._last_dir:
+            if interval < config.ENCODER_FAST_MS:
+                step = 3
+            elif interval < config.ENCODER_ACCEL_MS:
+                step = 2
+        self._last_click = now
+        self._last_dir = direction
+        return direction * clicks * step
+
+    def read_presses(self):
+        """Button presses since the last call."""
+        if not self.use_irq:
+            level = self.sw.value()
+            if self._sw_level and not level:
+                self._press()
+            self._sw_level = level
+        presses = self.presses
+        count = presses - self._read_presses
+        self._read_presses = presses
+        return count
 
     def button_pressed(self):
         if self.sw is None:
@@ -0,0 +1,124 @@
+# engine.py — Measurement engine on the second RP2040 core
+#
+# Core 1 owns the SignalAnalyzer (its PIO state machines and the ADC) and
+# loops over the measurement for the current mode, publishing each result
+# into a lock-protected mailbox. The UI on core 0 only reads the mailbox, so
+# a slow measurement never stalls encoder handling or display refresh.
+import _thread
+import utime
+import config
+
+
+class Mailbox:
+    """Latest value per mode, written by core 1 and read by core 0."""
+
+    def __init__(self):
+        self._lock = _thread.allocate_lock()
+        self._values = {}
+        self.updates = 0   # Incremented on every publish that changes a value
+        self.notify = None # Optional ThreadSafeFlag set on those publishes
+
+    def publish(self, key, value):
+        with self._lock:
+            changed = self._values.get(key) != value
+            self._values[key] = value
+            if changed:
+                self.updates += 1
+        if changed and self.notify is not None:
+            self.notify.set()
+
+    def read(self, key, default=None):
+        with self._lock:
+            return self._values.get(key, default)
+
+
+# Measurement per mode; modes not listed here are read directly by the UI
+def _voltage(analyzer):
+    envelope = analyzer.voltage_envelope()
+    return envelope, analyzer.voltage_state(envelope[0])
+
+def _uart(analyzer):
+    data, count, errors = analyzer.uart()
+    return bytes(data), count, errors   # Copy: the analyzer reuses its buffer
+
+def _scope(analyzer):
+    trace, vmin, vmax, window_us = analyzer.scope()
+    return bytes(trace), vmin, vmax, window_us   # Copy, as for uart
+
+MEASUREMENTS = {
+    "frequency": lambda analyzer: analyzer.frequency(),
+    "pulse": lambda analyzer: analyzer.pulse_stats(),
+    "duty": lambda analyzer: analyzer.duty_cycle(),
+    "voltage": _voltage,
+    "uart": _uart,
+    "scope": _scope,
+    "glitch": lambda analyzer: analyzer.glitches(),
+    "edge_times": lambda analyzer: analyzer.edge_times(),
+}
+
+mailbox = Mailbox()
+_analyzer = None
+_mode = None
+_running = False
+
+
+def _worker():
+    global _running
+    try:
+        while _running:
+            mode = _mode
+            measure = MEASUREMENTS.get(mode)
+            if measure is None:
+                # Nothing to measure: give the state machines back
+                _analyzer.stop()
+            else:
+                mailbox.publish(mode, measure(_analyzer))
+            utime.sleep_ms(config.ENGINE_INTERVAL_MS)
+    finally:
+        _analyzer.stop()
+        _running = False
+
+
+def start(analyzer):
+    """Run measurements for analyzer on core 1."""
+    global _analyzer, _running
+    _analyzer = analyzer
+    _running = True
+    _thread.start_new_thread(_worker, ())
+
+
+def stop():
+    global _running
+    _running = False
+
+
+def running():
+    return _running
+
+
+def set_mode(mode):
+    global _mode
+    _mode = mode
+
+
+def read(mode, default=None):
+    """Latest published result for mode.
+
+    Without the engine thread (safe mode) the measurement runs inline and
+    is published too, so a changed value still sets mailbox.notify.
+    """
+    if _running:
+        return mailbox.read(mode, default)
+
+    measure = MEASUREMENTS.get(mode)
+    if measure is None or _analyzer is None:
+        return default
+    value = measure(_analyzer)
+    mailbox.publish(mode, value)
+    return value
+
+
+def attach(analyzer):
+    """Use analyzer for inline measurements without starting core 1."""
+    global _analyzer
+    _analyzer = analyzer
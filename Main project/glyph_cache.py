@@ -0,0 +1,81 @@
+# glyph_cache.py — Pre-rendered text bitmaps for the OLED
+import framebuf
+
+FONT_SIZE = 8   # framebuf's built-in font is 8x8
+
+
+class TextCache:
+    """Bounded LRU cache of MONO_VLSB glyphs keyed by (char, colour, scale).
+
+    Text is drawn one character at a time at every scale, so readings that
+    change every frame still hit: the alphabet on screen is small even when
+    the strings are not. Keys are packed into one small int, so a hit
+    allocates nothing.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = {}   # key -> [framebuffer, last_used]
+        self._clock = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _render(self, code, color, scale):
+        width = FONT_SIZE
+        buf = bytearray(width)   # one page: 8 rows
+        fb = framebuf.FrameBuffer(buf, width, FONT_SIZE, framebuf.MONO_VLSB)
+        fb.fill(1 - color)
+        fb.text(chr(code), 0, 0, color)
+        if scale == 1:
+            return fb
+
+        size = FONT_SIZE * scale
+        big_buf = bytearray(width * scale * scale)   # height = scale pages
+        big = framebuf.FrameBuffer(big_buf, width * scale, size, framebuf.MONO_VLSB)
+        big.fill(1 - color)
+        for y in range(FONT_SIZE):
+            for x in range(width):
+                if fb.pixel(x, y) == color:
+                    big.fill_rect(x * scale, y * scale, scale, scale, color)
+        return big
+
+    def get(self, code, color=1, scale=1):
+        """Return the bitmap for character code, rendering it on a miss."""
+        self._clock += 1
+        key = code << 3 | scale << 1 | color
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            entry = [self._render(code, color, scale), 0]
+            self._entries[key] = entry
+        else:
+            self.hits += 1
+
+        entry[1] = self._clock
+        return entry[0]
+
+    def _evict(self):
+        oldest = None
+        oldest_used = None
+        for key, entry in self._entries.items():
+            if oldest_used is None or entry[1] < oldest_used:
+                oldest = key
+                oldest_used = entry[1]
+        del self._entries[oldest]
+
+    def draw(self, target, text, x, y, color=1, scale=1):
+        """Blit text onto target at (x, y), background included."""
+        step = FONT_SIZE * scale
+        for code in text.encode():
+            target.blit(self.get(code, color, scale), x, y)
+            x += step
+
+    def stats(self):
+        """Return (hits, misses, entries)."""
+        return self.hits, self.misses, len(self._entries)
+
+    def clear(self):
+        self._entries = {}
@@ -1,9 +1,11 @@
 # logic.py
 
 from machine import Pin
+from array import array
 import config
 import utime
 import micropython
+from pio_based_helpers import EdgeCounter
 
 _last_edge_us = 0
 _last_level = 0
@@ -13,17 +15,40 @@ _pulse_count = 0
 
 _input_pin = Pin(config.INPUT_PIN, Pin.IN, Pin.PULL_DOWN)
 
+# Hardware edge counter behind get_pulse_count(), started by init_monitor().
+# _pulse_count from the IRQ is only the fallback without it.
+_counter = None
+
 DEBOUNCE_US = config.DEBOUNCE_US
 
 _rising_cb = None
 _falling_cb = None
 _change_cb = None
-_async_hooks = []
+
+# Async edge waiting: the IRQ only sets _edge_flag; _dispatch_edges() then
+# reads the new edges from the ring and wakes the matching waiters.
+_edge_flag = None   # uasyncio.ThreadSafeFlag, created by the first waiter
+_waiters = []       # [level, first edge index, Event, edge ticks_us]
+
+# Edge history: a fixed ring of ticks_us timestamps plus one level bit per
+# slot, filled by the IRQ handler without allocating. _edge_total counts
+# every edge ever recorded, modulo 2**30 like ticks_us so it stays a small
+# int; slot = total % RING_SIZE.
+RING_SIZE = config.EDGE_RING_SIZE
+_RING_MASK = RING_SIZE - 1
+_INDEX_MASK = (1 << 30) - 1
+
+_edge_times = array("I", bytes(4 * RING_SIZE))
+_edge_levels = bytearray(RING_SIZE // 8)
+_edge_total = 0
+_ring_wrapped = False
+_edges_lost = 0
 
 
 def _edge_handler(pin):
     global _last_edge_us, _last_level, _last_direction
     global _last_debounce_us, _pulse_count
+    global _edge_total, _ring_wrapped
 
     now = utime.ticks_us()
     level = pin.value()
@@ -36,6 +61,17 @@ def _edge_handler(pin):
     _last_level = level
     _last_direction = "rise" if level else "fall"
 
+    # Record in the ring
+    slot = _edge_total & _RING_MASK
+    _edge_times[slot] = now
+    if level:
+        _edge_levels[slot >> 3] |= 1 << (slot & 7)
+    else:
+        _edge_levels[slot >> 3] &= ~(1 << (slot & 7))
+    _edge_total = (_edge_total + 1) & _INDEX_MASK
+    if slot == _RING_MASK:
+        _ring_wrapped = True
+
     if level == 1:
         _pulse_count += 1
         if _rising_cb:
@@ -47,13 +83,15 @@ def _edge_handler(pin):
     if _change_cb:
         _change_cb(level, now)
 
-    for hook in _async_hooks[:]:
-        if hook["target"] == level:
-            hook["triggered"] = True
+    if _edge_flag is not None:
+        _edge_flag.set()   # Wake the edge dispatcher task
 
 
 def init_monitor():
-    global _last_level
+    global _last_level, _counter
+
+    _counter = EdgeCounter(config.INPUT_PIN, config.COUNT_EDGES, config.EDGE_GLITCH_CYCLES)
+    _counter.start()
 
     _last_level = _input_pin.value()
     micropython.alloc_emergency_exception_buf(100)
@@ -97,24 +135,149 @@ def last_edge_time():
 
 
 def get_pulse_count():
+    if _counter is not None:
+        return _counter.count()
     return _pulse_count
 
 
 def reset_pulse_count():
     global _pulse_count
     _pulse_count = 0
+    if _counter is not None:
+        _counter.reset()
+
+
+# --- Edge history ---
+def edge_index():
+    """Index the next edge will get; pass it to edges_since() later."""
+    return _edge_total
+
+
+def edges_stored():
+    return RING_SIZE if _ring_wrapped else _edge_total
+
 
+def edges_lost():
+    """Edges overwritten before edges_since() could return them."""
+    return _edges_lost
 
-async def wait_for_edge(target_level=1):
+
+def _edge_at(index):
+    slot = index & _RING_MASK
+    return _edge_times[slot], (_edge_levels[slot >> 3] >> (slot & 7)) & 1
+
+
+def edges_since(index):
+    """Return (edges, next_index) with edges a list of (ticks_us, level).
+
+    Edges the ring no longer holds are skipped and added to edges_lost(),
+    including any overwritten by the IRQ while this copies them out.
+    """
+    global _edges_lost
+
+    total = _edge_total
+    count = (total - index) & _INDEX_MASK
+    if count > RING_SIZE:
+        _edges_lost += count - RING_SIZE
+        index = (total - RING_SIZE) & _INDEX_MASK
+        count = RING_SIZE
+
+    edges = [_edge_at(index + k) for k in range(count)]
+
+    # Slots reused while copying hold newer edges: drop them
+    overwritten = ((_edge_total - index) & _INDEX_MASK) - RING_SIZE
+    if overwritten > 0:
+        overwritten = min(overwritten, count)
+        _edges_lost += overwritten
+        del edges[:overwritten]
+
+    return edges, total
+
+
+def edge_rate(window_ms=1000):
+    """Edges per second over the last window_ms.
+
+    If the ring spans less than the window, the rate is taken over the
+    edges it holds instead.
+    """
+    now = utime.ticks_us()
+    window_us = window_ms * 1000
+    total = _edge_total
+    stored = edges_stored()
+
+    count = 0
+    newest = oldest = 0
+    for k in range(1, stored + 1):
+        t = _edge_times[(total - k) & _RING_MASK]
+        if utime.ticks_diff(now, t) > window_us:
+            break
+        if count == 0:
+            newest = t
+        oldest = t
+        count += 1
+
+    if count == RING_SIZE:
+        span_us = utime.ticks_diff(newest, oldest)
+        return (count - 1) * 1_000_000 / span_us if span_us > 0 else 0.0
+    return count * 1000 / window_ms
+
+
+def interval_histogram(bin_us, bins=16):
+    """Count intervals between stored edges in bins of bin_us.
+
+    Intervals of bins * bin_us or more land in the last bin.
+    """
+    counts = [0] * bins
+    total = _edge_total
+    stored = edges_stored()
+    previous = None
+    for k in range(stored, 0, -1):
+        t = _edge_times[(total - k) & _RING_MASK]
+        if previous is not None:
+            counts[min(utime.ticks_diff(t, previous) // bin_us, bins - 1)] += 1
+        previous = t
+    return counts
+
+
+async def _dispatch_edges(index):
+    while True:
+        await _edge_flag.wait()
+        edges, next_index = edges_since(index)
+        n = (next_index - len(edges)) & _INDEX_MASK
+        for t, level in edges:
+            for waiter in _waiters:
+                # Only edges recorded after the waiter started count
+                if (waiter[0] == level and waiter[3] is None
+                        and (n - waiter[1]) & _INDEX_MASK < 1 << 29):
+                    waiter[3] = t
+                    waiter[2].set()
+            n = (n + 1) & _INDEX_MASK
+        index = next_index
+
+
+async def wait_for_edge(target_level=1, timeout_ms=None):
+    """Wait for the next edge to target_level.
+
+    Returns the ticks_us timestamp taken in the IRQ, or None on timeout.
+    Any number of tasks may wait at once.
+    """
     import uasyncio
+    global _edge_flag
 
-    hook = {"target": target_level, "triggered": False}
-    _async_hooks.append(hook)
+    if _edge_flag is None:
+        _edge_flag = uasyncio.ThreadSafeFlag()
+        uasyncio.create_task(_dispatch_edges(edge_index()))
 
+    waiter = [target_level, edge_index(), uasyncio.Event(), None]
+    _waiters.append(waiter)
     try:
-        while not hook["triggered"]:
-            await uasyncio.sleep_ms(1)
+        if timeout_ms is None:
+            await waiter[2].wait()
+        else:
+            await uasyncio.wait_for_ms(waiter[2].wait(), timeout_ms)
+    except uasyncio.TimeoutError:
+        pass
     finally:
-        _async_hooks.remove(hook)
+        _waiters.remove(waiter)
 
-    return utime.ticks_us()
\ No newline at end of file
+    return waiter[3]
@@ -16,38 +16,31 @@ display.clear()
 import logic
 from encoder import RotaryEncoder
 from signal_analyzer import SignalAnalyzer
+import engine
 analyzer = SignalAnalyzer(config.INPUT_PIN)
-encoder = RotaryEncoder(config.A_PIN, config.B_PIN, config.PSH_BTN)
-last_encoder_event = 0
+encoder = RotaryEncoder(config.A_PIN, config.B_PIN, config.PSH_BTN, use_irq=not config.SAFE_MODE)
 
 def handle_button():
-    global freq_min, freq_max, last_button_state
+    global freq_min, freq_max
 
-    pressed = encoder.button_pressed()
-    current_button_state = 0 if pressed else 1
-
-    if last_button_state == 1 and current_button_state == 0:
-        if current_mode == "edge_count":
-            logic.reset_pulse_count()
-        elif current_mode == "frequency":
-            freq_min = None
-            freq_max = None
-
-    last_button_state = current_button_state
+    if current_mode == "edge_count":
+        logic.reset_pulse_count()
+    elif current_mode == "frequency":
+        freq_min = None
+        freq_max = None
 
 
 async def handle_encoder():
-    global last_encoder_event
+    # The PIO counts the knob; this wakes on its pin IRQs (polls in safe mode)
     while True:
+        await encoder.wait()
         delta = encoder.read()
         if delta != 0:
-            now = utime.ticks_ms()
-            # 200ms UI debounce
-            if utime.ticks_diff(now, last_encoder_event) > 200:
-                last_encoder_event = now
-                switch_mode(delta)
-        handle_button()
-        await uasyncio.sleep_ms(1)
+            switch_mode(delta)
+            render_flag.set()
+        if encoder.read_presses():
+            handle_button()
+            render_flag.set()
 
 
 # Initialize IRQ only if not in safe mode
@@ -55,14 +48,23 @@ if not config.SAFE_MODE:
     logic.init_monitor()
 
 # Modes
-modes = ["logic", "frequency", "pulse", "duty", "voltage", "edge_count"]
+modes = ["logic", "frequency", "pulse", "edge_times", "duty", "voltage", "scope", "glitch", "edge_count", "uart"]
 current_mode = "logic"
 display.show_mode(current_mode)
+
+# Measurements run on core 1 and are read from the engine's mailbox
+engine.set_mode(current_mode)
+if config.SAFE_MODE:
+    engine.attach(analyzer)
+else:
+    engine.start(analyzer)
 last_mode_change = utime.ticks_ms()
 
+NO_PULSES = ((0, 0.0, 0.0, 0.0, 0.0), (0, 0.0, 0.0, 0.0, 0.0))
+NO_VOLTAGE = (0.0, 0.0, 0.0, 0.0, 0.0)
+NO_TRACE = (bytes(256), 0.0, 0.0, 0)
 freq_min = None
 freq_max = None
-last_button_state = 1
 
 # Test PWM generator (use scope to verify)
 if config.TEST_PWM:
@@ -83,15 +85,13 @@ def switch_mode(delta):
 
     now = utime.ticks_ms()
 
-    # debounce/cooldown
-    if utime.ticks_diff(now, last_mode_change) < 150:
-        return
-
+    # The decoder handles bounce; delta may skip several modes on a fast spin
     idx = (modes.index(current_mode) + delta) % len(modes)
     current_mode = modes[idx]
 
     last_mode_change = now
     display_state = "normal"
+    engine.set_mode(current_mode)
     display.show_mode(current_mode)
 
 
@@ -99,52 +99,138 @@ def switch_mode(delta):
 
 
 # --- Update Display ---
+# Draws into the framebuffer and schedules a frame; display.refresh_task()
+# pushes it over I2C in the background so encoder handling keeps running.
+def render():
+    global freq_min, freq_max
+    if display_state == "show_number" and number_to_show is not None:
+        # Keep showing the number on display
+        display.show_number(number_to_show)
+    else:
+        # Latest values for the current mode
+        if current_mode == "logic":
+            display.show_logic_detail(
+                logic.read_level(),
+                logic.last_direction(),
+                logic.edge_age_ms(),
+            )
+
+        elif current_mode == "frequency":
+            freq = engine.read("frequency", 0.0)
+            if freq > 0:
+                freq_min = freq if freq_min is None else min(freq_min, freq)
+                freq_max = freq if freq_max is None else max(freq_max, freq)
+            display.show_frequency_detail(freq, freq_min, freq_max)
+
+        elif current_mode == "pulse":
+            high, low = engine.read("pulse", NO_PULSES)
+            display.show_pulse_stats(high, low)
+
+        elif current_mode == "edge_times":
+            high, low = engine.read("edge_times", NO_PULSES)
+            if high[0] and low[0]:
+                display.show_high_low(high[2], low[2], high[4], low[4])
+            else:
+                display.show_high_low(0, 0)
+
+        elif current_mode == "duty":
+            duty, freq = engine.read("duty", (0.0, 0.0))
+            display.show_duty_cycle(duty, freq)
+
+        elif current_mode == "voltage":
+            envelope, state = engine.read("voltage", (NO_VOLTAGE, "LOW"))
+            display.show_voltage(envelope[0], state, envelope)
+
+        elif current_mode == "scope":
+            trace, vmin, vmax, window_us = engine.read("scope", NO_TRACE)
+            display.show_scope(trace, vmin, vmax, window_us)
+
+        elif current_mode == "glitch":
+            count, shortest_ns, recent = engine.read("glitch", (0, None, []))
+            now = utime.ticks_us()
+            ages = [(utime.ticks_diff(now, t) // 1000, width) for t, width in recent]
+            display.show_glitches(
+                count, shortest_ns, ages, config.GLITCH_MAX_CYCLES * config.CLOCK_NS
+            )
+
+        elif current_mode == "edge_count":
+            display.show_edge_count(logic.get_pulse_count())
+
+        elif current_mode == "uart":
+            data, count, errors = engine.read("uart", (b"", 0, 0))
+            display.show_uart(data, count, errors, config.UART_BAUD)
+
+
+# --- Render scheduling ---
+# A frame is drawn when the engine publishes a changed value, the input pin
+# toggles in a mode that shows its edges, or the knob moves (all set
+# render_flag), but no faster than the frame cap. With nothing new it still
+# redraws every RENDER_REFRESH_MS (edge ages, timeouts), dropping to
+# RENDER_IDLE_MS once the display has been static for RENDER_IDLE_AFTER_MS. In safe mode each frame also takes the
+# measurement, so measurement modes are drawn every INLINE_MEASURE_MS.
+render_flag = uasyncio.ThreadSafeFlag()
+engine.mailbox.notify = render_flag
+
+# Modes drawn from the pin's edges rather than from the engine's mailbox
+EDGE_DRIVEN_MODES = ("logic", "edge_count")
+
+def _on_edge(level, now):
+    if current_mode in EDGE_DRIVEN_MODES:
+        render_flag.set()
+
+logic.on_change(_on_edge)
+
+
+async def _wait_render(timeout_ms):
+    """Wait for render_flag; return True if it was set."""
+    try:
+        await uasyncio.wait_for_ms(render_flag.wait(), timeout_ms)
+        return True
+    except uasyncio.TimeoutError:
+        return False
+
+
 async def periodic_update():
-    global display_state, number_to_show
+    last_frame = utime.ticks_ms()
+    last_change = last_frame
     while True:
-        if display_state == "show_number" and number_to_show is not None:
-            # Keep showing the number on display
-            display.show_number(number_to_show)
+        now = utime.ticks_ms()
+        idle = utime.ticks_diff(now, last_change) > config.RENDER_IDLE_AFTER_MS
+        timeout = config.RENDER_IDLE_MS if idle else config.RENDER_REFRESH_MS
+        inline = not engine.running() and current_mode in engine.MEASUREMENTS
+        if inline:
+            timeout = config.INLINE_MEASURE_MS
+
+        if await _wait_render(timeout):
+            last_change = utime.ticks_ms()
+
+        # Frame rate cap, and leave the mode name up for a moment
+        if inline:
+            cap = config.INLINE_MEASURE_MS
+        elif current_mode == "scope":
+            cap = config.SCOPE_FRAME_MS
         else:
-            # Normal update loop
-            if current_mode == "logic":
-                display.show_logic_detail(
-                    logic.read_level(),
-                    logic.last_direction(),
-                    logic.edge_age_ms(),
-                )
-
-            elif current_mode == "frequency":
-                freq = analyzer.frequency()
-                global freq_min, freq_max
-                if freq > 0:
-                    freq_min = freq if freq_min is None else min(freq_min, freq)
-                    freq_max = freq if freq_max is None else max(freq_max, freq)
-                display.show_frequency_detail(freq, freq_min, freq_max)
-
-            elif current_mode == "pulse":
-                width = analyzer.pulse_width_us()
-                display.show_pulse(width)
-
-            elif current_mode == "duty":
-                duty, freq = analyzer.duty_cycle()
-                display.show_duty_cycle(duty, freq)
-
-            elif current_mode == "voltage":
-                voltage = analyzer.voltage()
-                state = analyzer.voltage_state(voltage)
-                display.show_voltage(voltage, state)
-
-            elif current_mode == "edge_count":
-                display.show_edge_count(logic.get_pulse_count())
-        await uasyncio.sleep_ms(300)  # Display update rate
+            cap = config.RENDER_MIN_FRAME_MS
+        wait = max(
+            cap - utime.ticks_diff(utime.ticks_ms(), last_frame),
+            config.MODE_BANNER_MS - utime.ticks_diff(utime.ticks_ms(), last_mode_change),
+        )
+        if wait > 0:
+            await uasyncio.sleep_ms(wait)
+
+        render()
+        last_frame = utime.ticks_ms()
 
 # --- Run everything ---
 async def main():
     tasks = [
         handle_encoder(),
         periodic_update(),
+        display.refresh_task(),
     ]
+    if config.SUMP_SERVER and not config.SAFE_MODE:
+        import sump
+        tasks.append(sump.serve_usb())
     await uasyncio.gather(*tasks)
 
 uasyncio.run(main())
@@ -1,11 +1,47 @@
 import rp2
 from machine import Pin
 import utime
+from array import array
 import config
+from stats import RunningStats
 # Constants
 CLOCK_NS = config.CLOCK_NS
 DEFAULT_TIMEOUT_MS = config.DEFAULT_TIMEOUT_MS
 
+# -----------------------------------------------------------------------------
+# State machine bookkeeping
+# -----------------------------------------------------------------------------
+# Each PIO block has only 32 instruction slots, fewer than all the programs
+# below need together. Measurements claim their state machine when they start
+# and hand the instruction memory back when they stop.
+_loaded = {}  # sm id -> program
+
+def claim_sm(sm_id, program, **kwargs):
+    """Load program onto state machine sm_id, replacing what it ran before."""
+    release_sm(sm_id)
+    sm = rp2.StateMachine(sm_id, program, **kwargs)
+    _loaded[sm_id] = program
+    return sm
+
+def restart_sm(sm, word):
+    """Restart a running program from the top with a new setup word."""
+    sm.active(0)
+    while sm.rx_fifo():
+        sm.get()  # Results from the old setup
+    sm.restart()
+    sm.put(word)
+    sm.active(1)
+
+def release_sm(sm_id):
+    """Stop state machine sm_id and free its program's instruction memory."""
+    program = _loaded.pop(sm_id, None)
+    if program is None:
+        return
+    sm = rp2.StateMachine(sm_id)
+    sm.active(0)
+    sm.irq(None)
+    rp2.PIO(sm_id // 4).remove_program(program)
+
 # -----------------------------------------------------------------------------
 # Pulse Width Measurement (SM0)
 # -----------------------------------------------------------------------------
@@ -25,15 +61,18 @@ def pulse_width_capture():
 
 class PrecisionPulse:
     def __init__(self, pin_num):
-        self.sm = rp2.StateMachine(
-            0, pulse_width_capture,
-            freq=125_000_000,
-            in_base=Pin(pin_num),
-            jmp_pin=Pin(pin_num)
-        )
+        self.pin = Pin(pin_num)
+        self.sm = None
         self.active = False
 
     def measure(self, samples=10, timeout_ms=DEFAULT_TIMEOUT_MS):
+        # Claimed per measurement: SM0 is shared with the logic capture
+        self.sm = claim_sm(
+            0, pulse_width_capture,
+            freq=125_000_000,
+            in_base=self.pin,
+            jmp_pin=self.pin
+        )
         self.sm.active(1)
         results = []
         start_time = utime.ticks_ms()
@@ -46,186 +85,601 @@ class PrecisionPulse:
                 results.append((0xFFFFFFFF - self.sm.get()) * 2 * CLOCK_NS / 1000)
             return round((sum(results) / len(results)), 2) if results else 0.0
         finally:
-            self.sm.active(0)
+            release_sm(0)
+            self.sm = None
+
+# -----------------------------------------------------------------------------
+# Gated Frequency Counter (SM4)
+# -----------------------------------------------------------------------------
+# Free-running: the PIO counts rising edges itself for a gate window of
+# 3-cycle loop iterations, pushes the count and raises an IRQ, then starts
+# the next window. Every path through the loop takes exactly 3 cycles, so the
+# gate is exact and signals up to ~20 MHz (3 cycles high + 3 low) are counted.
+GATE_LOOP_CYCLES = 3
+
+@rp2.asm_pio()
+def count_frequency():
+    pull(block)               # Gate length (loop iterations - 1) from CPU
+    label("gate")
+    mov(x, invert(null))      # Edge counter
+    mov(y, osr)               # Gate counter
+    jmp(pin, "high")
+
+    label("low")              # Pin LOW: wait for it to rise
+    jmp(pin, "rise")
+    jmp(y_dec, "low")   [1]
+    jmp("publish")
+
+    label("rise")             # Rising edge: count it
+    jmp(x_dec, "counted")
+    label("counted")
+    jmp(y_dec, "high")
+    jmp("publish")
+
+    label("high")             # Pin HIGH: wait for it to fall
+    jmp(pin, "stay_high")
+    jmp(y_dec, "low")   [1]
+    jmp("publish")
+    label("stay_high")
+    jmp(y_dec, "high")  [1]
+
+    label("publish")
+    mov(isr, invert(x))       # Rising edges seen during the gate
+    push(noblock)
+    irq(rel(0))               # Tell the CPU a count is ready
+    jmp("gate")
+
+
+class FrequencyMeasure:
+    def __init__(self, pin_num, gate_ms=100):
+        self.pin = Pin(pin_num, Pin.IN)
+        self.gate_ms = gate_ms
+        self.sm = None
+
+        # Latest completed gate window, updated from the PIO IRQ
+        self.edges = 0
+        self.freq_hz = 0.0
+        self.gates = 0
+
+    def _gate_loops(self):
+        return config.PIO_FREQ // 1000 * self.gate_ms // GATE_LOOP_CYCLES
+
+    def _on_gate(self, sm):
+        if not sm.rx_fifo():
+            return
+        # Drain everything so the FIFO never fills; keep the newest count
+        while sm.rx_fifo():
+            self.edges = sm.get()
+            self.gates += 1
+        gate_ns = self._gate_loops() * GATE_LOOP_CYCLES * CLOCK_NS
+        self.freq_hz = self.edges * 1_000_000_000 / gate_ns
+
+    def start(self):
+        if self.sm is not None:
+            return
+        self.sm = claim_sm(
+            4, count_frequency,
+            freq=config.PIO_FREQ,  # 125 MHz (8 ns/cycle)
+            in_base=self.pin,
+            jmp_pin=self.pin
+        )
+        self.sm.irq(self._on_gate)
+        self.sm.put(self._gate_loops() - 1)
+        self.sm.active(1)
+
+    def stop(self):
+        if self.sm is None:
+            return
+        release_sm(4)
+        self.sm = None
+        self.edges = 0
+        self.freq_hz = 0.0
+
+    def set_gate(self, gate_ms):
+        """Change the gate window, keeping the last reading until the next one."""
+        if gate_ms == self.gate_ms:
+            return
+        self.gate_ms = gate_ms
+        if self.sm is not None:
+            restart_sm(self.sm, self._gate_loops() - 1)
+
+    def measure(self, sample_time_ms=100):
+        """Return (avg_period_ns, freq_hz, edge_count) of the latest gate.
+
+        Never blocks: the counter runs in the background once started, and
+        returns zeros until the first gate window has completed.
+        """
+        self.set_gate(sample_time_ms)
+        self.start()
+
+        if self.edges == 0:
+            return 0, 0.0, 0  # No edges detected
+
+        return 1_000_000_000 / self.freq_hz, self.freq_hz, self.edges
+
 
 # -----------------------------------------------------------------------------
-# Edge Timing (Rise/Fall) (SM1)
+# Reciprocal Frequency (SM5)
 # -----------------------------------------------------------------------------
+# Times N whole periods against the 125 MHz clock instead of counting edges
+# in a window. Both count loops take 2 cycles per decrement; the "rose" step
+# takes 2 cycles without one, so total cycles = 2 * (decrements + N).
 @rp2.asm_pio()
-def edge_timing():
+def period_timestamp():
+    pull(block)               # Periods per measurement - 1
     wrap_target()
-    wait(1, pin, 0)          # Wait for rising edge
-    set(x, 31)               # Smaller counter
-    
-    # Measure HIGH duration
-    label("rise")
-    jmp(pin, "continue_rise") # Continue if pin still HIGH
-    jmp("fall_start")         # Jump to fall measurement if pin LOW
-    label("continue_rise") 
-    jmp(x_dec, "rise")        # Decrement counter
-    
-    # Measure LOW duration
-    label("fall_start")
-    set(x, 31)
-    label("fall")
-    jmp(pin, "done")          # Jump if pin went HIGH
-    jmp(x_dec, "fall")        # Continue counting LOW duration
-    
-    label("done")
-    mov(isr, invert(x))       # Store result (0xFFFFFFFF - x)
-    push(block)               # Send result
+    mov(x, invert(null))      # Cycle counter
+    mov(y, osr)               # Periods still to go
+    wait(0, pin, 0)
+    wait(1, pin, 0)           # Start on a rising edge
+
+    label("high")
+    jmp(x_dec, "high_chk")
+    label("high_chk")
+    jmp(pin, "high")          # Count while HIGH
+
+    label("low")
+    jmp(pin, "rose")
+    jmp(x_dec, "low")         # Count while LOW
+
+    label("rose")
+    jmp(y_dec, "high")        # Next period, or done after N
+    mov(isr, invert(x))       # Decrements over N periods
+    push(noblock)
+    irq(rel(0))
     wrap()
-    
-class EdgeTimer:
-    def __init__(self, pin_num):
-        self.sm = rp2.StateMachine(
-            1, edge_timing,
-            freq=125_000_000,  # 125 MHz (8 ns resolution)
-            in_base=Pin(pin_num),
-            jmp_pin=Pin(pin_num)
-        )
-        self.clock_ns = 8  # 8 ns per cycle
 
-    def measure(self, samples=5, timeout_ms=1000):
+
+def auto_sample_time(freq_hz):
+    """Adjust measurement window (ms) based on expected frequency."""
+    if freq_hz < 100:
+        return 200  # 200ms for low freq
+    elif freq_hz < 1000:
+        return 50   # 50ms for mid freq
+    else:
+        return 10   # 10ms for high freq
+
+
+class ReciprocalFrequency:
+    def __init__(self, pin_num, periods=1):
+        self.pin = Pin(pin_num, Pin.IN)
+        self.periods = periods
+        self.sm = None
+
+        # Latest result, updated from the PIO IRQ
+        self.period_ns = 0.0
+        self.freq_hz = 0.0
+        self.updated_ms = None
+
+    def _on_result(self, sm):
+        if not sm.rx_fifo():
+            return
+        while sm.rx_fifo():
+            decrements = sm.get()
+        cycles = 2 * (decrements + self.periods)
+        self.period_ns = cycles * CLOCK_NS / self.periods
+        self.freq_hz = 1_000_000_000 / self.period_ns
+        self.updated_ms = utime.ticks_ms()
+
+    def start(self):
+        if self.sm is not None:
+            return
+        self.sm = claim_sm(
+            5, period_timestamp,
+            freq=config.PIO_FREQ,
+            in_base=self.pin,
+            jmp_pin=self.pin
+        )
+        self.sm.irq(self._on_result)
+        self.sm.put(self.periods - 1)
         self.sm.active(1)
-        self.sm.restart()  # Clear FIFO
-        results = []
-        start_time = utime.ticks_ms()
 
-        try:
-            for _ in range(samples):
-                # Wait for 2 values (rise + fall)
-                while self.sm.rx_fifo() < 2:
-                    if utime.ticks_diff(utime.ticks_ms(), start_time) > timeout_ms:
-                        return (0.0, 0.0)
-                # Read and convert to nanoseconds
-                rise_cycles = self.sm.get()  # First: rise time
-                fall_cycles = self.sm.get()  # Second: fall time
-                rise_ns = rise_cycles * self.clock_ns
-                fall_ns = fall_cycles * self.clock_ns
-                results.append((rise_ns, fall_ns))
-            
-            # Calculate averages
-            avg_rise = sum(r[0] for r in results) / len(results)
-            avg_fall = sum(r[1] for r in results) / len(results)
-            return (avg_rise, avg_fall)
-        finally:
-            self.sm.active(0)
-            
+    def stop(self):
+        if self.sm is None:
+            return
+        release_sm(5)
+        self.sm = None
+        self.period_ns = 0.0
+        self.freq_hz = 0.0
+        self.updated_ms = None
+
+    def set_periods(self, periods):
+        if periods == self.periods:
+            return
+        self.periods = periods
+        if self.sm is not None:
+            restart_sm(self.sm, periods - 1)
+
+    def fresh(self):
+        """True if the last result is recent enough to still describe the input."""
+        if self.updated_ms is None:
+            return False
+        expected_ms = self.periods * self.period_ns / 1_000_000
+        age_ms = utime.ticks_diff(utime.ticks_ms(), self.updated_ms)
+        return age_ms < DEFAULT_TIMEOUT_MS + 2 * expected_ms
+
+
+class AutoFrequency:
+    """Gated counting plus reciprocal timing, picked by signal rate.
+
+    The gated counter always runs: it gives a quick estimate and covers fast
+    signals. Below config.RECIPROCAL_MAX_HZ the reciprocal result is used,
+    averaged over enough whole periods to fill auto_sample_time(), so low
+    frequencies read with sub-Hz resolution without long gates.
+    """
+
+    def __init__(self, pin_num):
+        self.gated = FrequencyMeasure(pin_num, gate_ms=auto_sample_time(0))
+        self.reciprocal = ReciprocalFrequency(pin_num)
+
+    def start(self):
+        self.gated.start()
+        self.reciprocal.start()
+
+    def stop(self):
+        self.gated.stop()
+        self.reciprocal.stop()
+
+    def _retune(self, estimate_hz):
+        window_ms = auto_sample_time(estimate_hz)
+        self.gated.set_gate(window_ms)
+
+        # Only re-arm when the period count is off by 2x, to avoid thrashing
+        periods = max(1, int(estimate_hz * window_ms / 1000))
+        current = self.reciprocal.periods
+        if periods > current * 2 or periods < current // 2:
+            self.reciprocal.set_periods(periods)
+
+    def frequency(self):
+        self.start()
+        estimate = self.gated.freq_hz
+        if estimate:
+            self._retune(estimate)
+
+        if estimate < config.RECIPROCAL_MAX_HZ and self.reciprocal.fresh():
+            return self.reciprocal.freq_hz
+        return estimate
+
+    def measure(self):
+        """Return (avg_period_ns, freq_hz, edge_count) like FrequencyMeasure."""
+        freq_hz = self.frequency()
+        if freq_hz == 0:
+            return 0, 0.0, 0
+        return 1_000_000_000 / freq_hz, freq_hz, self.gated.edges
+
+
 # -----------------------------------------------------------------------------
-# Smart Frequency (Period + Edges) (SM2)
+# Duty Cycle: HIGH + LOW of the same period (SM6)
 # -----------------------------------------------------------------------------
-@rp2.asm_pio()
-def measure_frequency():
-    # Initial sync to first rising edge
-    wait(0, pin, 0)       # Wait for LOW
-    wait(1, pin, 0)       # Wait for first rising edge
-    wrap_target()          # Start loop here
-    
-    # Wait for full period (falling then rising edge)
-    wait(0, pin, 0)       # Wait for falling edge
-    wait(1, pin, 0)       # Wait for next rising edge
-    mov(isr, null)        # Push dummy value (0) to FIFO
-    push()                # Signal one period completed
-    wrap()                # Loop back to wrap_target
+# Counts the HIGH time and then the LOW time of one period back to back and
+# pushes them as a pair, so duty, period and frequency all come from one
+# coherent capture. Both loops take 2 cycles (16 ns) per decrement. Pushes
+# block, so a full FIFO stalls the program instead of splitting a pair.
+@rp2.asm_pio(fifo_join=rp2.PIO.JOIN_RX)
+def high_low_capture():
+    wrap_target()
+    wait(0, pin, 0)           # Sync to LOW
+    wait(1, pin, 0)           # Rising edge starts the period
+    mov(x, invert(null))
+    label("high")
+    jmp(x_dec, "high_chk")
+    label("high_chk")
+    jmp(pin, "high")          # Count while HIGH
+    mov(y, invert(null))
+    label("low")
+    jmp(pin, "done")          # Next rising edge ends the period
+    jmp(y_dec, "low")         # Count while LOW
+    label("done")
+    mov(isr, invert(x))       # HIGH count
+    push(block)
+    mov(isr, invert(y))       # LOW count
+    push(block)
+    wrap()
 
+HIGH_LOW_LOOP_CYCLES = 2
 
 
-class FrequencyMeasure:
+class DutyCycleMeasure:
     def __init__(self, pin_num):
         self.pin = Pin(pin_num, Pin.IN)
-        self.sm = rp2.StateMachine(
-            2, measure_frequency,
-            freq=125_000_000,  # 125 MHz (8 ns/cycle)
+        self.sm = None
+
+        # Latest result
+        self.high_ns = 0.0
+        self.low_ns = 0.0
+        self.updated_ms = None
+
+    def start(self):
+        if self.sm is not None:
+            return
+        self.sm = claim_sm(
+            6, high_low_capture,
+            freq=config.PIO_FREQ,
             in_base=self.pin,
             jmp_pin=self.pin
         )
-        self.sm.active(0)
+        self.sm.active(1)
 
-    def measure(self, sample_time_ms=100):
+    def stop(self):
+        if self.sm is None:
+            return
+        release_sm(6)
+        self.sm = None
+        self.high_ns = 0.0
+        self.low_ns = 0.0
+        self.updated_ms = None
+
+    def fresh(self):
+        """True if the last result is recent enough to still describe the input."""
+        if self.updated_ms is None:
+            return False
+        # A pair takes a sync, a period and the period skipped after a push
+        expected_ms = 3 * (self.high_ns + self.low_ns) / 1_000_000
+        age_ms = utime.ticks_diff(utime.ticks_ms(), self.updated_ms)
+        return age_ms < DEFAULT_TIMEOUT_MS + expected_ms
+
+    def measure(self, periods=4, timeout_ms=50):
+        """Return (duty_percent, freq_hz) averaged over up to `periods` periods.
+
+        The capture keeps running between calls, so a slow period started
+        during one call completes in a later one. Only a full FIFO is stale
+        (the program stalls until it is drained): then the capture restarts.
+        Keeps the previous result if no period completes within timeout_ms,
+        until it is no longer fresh(); then returns (0.0, 0.0).
+        """
+        self.start()
+        sm = self.sm
+        if sm.rx_fifo() >= 8:
+            sm.active(0)
+            while sm.rx_fifo():
+                sm.get()
+            sm.restart()
+            sm.active(1)
+
+        high = 0
+        low = 0
+        count = 0
+        start_time = utime.ticks_ms()
+        while count < periods:
+            if sm.rx_fifo() >= 2:
+                high += sm.get()
+                low += sm.get()
+                count += 1
+            elif utime.ticks_diff(utime.ticks_ms(), start_time) > timeout_ms:
+                break
+
+        if count:
+            scale = HIGH_LOW_LOOP_CYCLES * CLOCK_NS / count
+            self.high_ns = high * scale
+            self.low_ns = low * scale
+            self.updated_ms = utime.ticks_ms()
+
+        period_ns = self.high_ns + self.low_ns
+        if period_ns == 0 or not self.fresh():
+            return 0.0, 0.0
+
+        duty = self.high_ns / period_ns * 100
+        return duty, 1_000_000_000 / period_ns
+
+
+class PulseStats:
+    """Continuous HIGH and LOW width statistics from high_low_capture (SM6).
+
+    Every pair drained from the FIFO is folded into two RunningStats, so a
+    window of millions of pulses costs the same memory as one. The program
+    re-syncs on each rising edge and stalls while the FIFO is full, so pulses
+    are sampled whenever the reader keeps up rather than strictly every one.
+    """
+
+    def __init__(self, pin_num, block=32):
+        self.pin = Pin(pin_num, Pin.IN)
+        self.sm = None
+        self.high = RunningStats()
+        self.low = RunningStats()
+        self._buf = array("I", bytes(4 * block))
+
+    def start(self):
+        """Start a new statistics window."""
+        if self.sm is not None:
+            return
+        self.reset()
+        self.sm = claim_sm(
+            6, high_low_capture,
+            freq=config.PIO_FREQ,
+            in_base=self.pin,
+            jmp_pin=self.pin
+        )
         self.sm.active(1)
-        self.sm.restart()  # Clear FIFO and reset state
+
+    def stop(self):
+        if self.sm is None:
+            return
+        release_sm(6)
+        self.sm = None
+
+    def reset(self):
+        self.high.reset()
+        self.low.reset()
+
+    def poll(self):
+        """Fold the pairs waiting in the FIFO; return how many there were."""
+        sm = self.sm
+        buf = self._buf
+        n = min(sm.rx_fifo() & ~1, len(buf))   # Whole HIGH/LOW pairs only
+        for i in range(n):
+            buf[i] = sm.get()
+        self.high.fold(buf, 0, n, 2)
+        self.low.fold(buf, 1, n, 2)
+        return n // 2
+
+    def collect(self, window_ms=50):
+        """Keep draining the FIFO for window_ms (meant for the core 1 worker)."""
+        self.start()
         start_time = utime.ticks_ms()
-        edge_count = 0
-        
-        # Count edges for the duration
-        while utime.ticks_diff(utime.ticks_ms(), start_time) < sample_time_ms:
-            if self.sm.rx_fifo() > 0:
-                self.sm.get()  # Discard dummy value
-                edge_count += 1
-        
-        self.sm.active(0)
-        
-        if edge_count == 0:
-            return 0, 0.0, 0  # No edges detected
-        
-        # Calculate results
-        total_time_ns = sample_time_ms * 1_000_000  # ms -> ns
-        avg_period_ns = total_time_ns / edge_count   # Average period
-        freq_hz = edge_count * 1000 / sample_time_ms  # Frequency
-        
-        return avg_period_ns, (freq_hz * 2), edge_count
+        while utime.ticks_diff(utime.ticks_ms(), start_time) < window_ms:
+            self.poll()
+
+    def summary(self):
+        """Return ((count, min, mean, max, stdev) HIGH, same LOW) in us."""
+        scale = HIGH_LOW_LOOP_CYCLES * CLOCK_NS / 1000
+        return self.high.summary(scale), self.low.summary(scale)
+
+
+class EdgeTimer(PulseStats):
+    """HIGH and LOW times in ns, streamed into running statistics (SM6).
+
+    Replaces the old SM1 edge_timing program, whose `set(x, 31)` counters
+    saturated after 31 loops and which blocked until its pairs were read;
+    high_low_capture counts with full 32-bit registers at 125 MHz.
+    """
+
+    def summary(self):
+        """Return ((count, min, mean, max, stdev) HIGH, same LOW) in ns."""
+        scale = HIGH_LOW_LOOP_CYCLES * CLOCK_NS
+        return self.high.summary(scale), self.low.summary(scale)
+
+    def measure(self, samples=5, timeout_ms=1000):
+        """Mean (high_ns, low_ns) once `samples` periods have been folded."""
+        self.start()
+        start_time = utime.ticks_ms()
+        while self.high.count < samples:
+            if utime.ticks_diff(utime.ticks_ms(), start_time) > timeout_ms:
+                break
+            self.poll()
+        high, low = self.summary()
+        return high[2], low[2]
 
 
 # -----------------------------------------------------------------------------
-# Rotary Encoder (SM3)
+# Edge Counter (SM2)
 # -----------------------------------------------------------------------------
-# encoder.pio
+# Counts every edge in x entirely in the PIO; the CPU only reads the total
+# on demand by forcing `mov isr, x` + `push`. An edge only counts once the
+# new level has held for the glitch filter (the setup word, in 2-cycle
+# loops), so shorter pulses are ignored. The level at start is pushed once;
+# rising and falling counts follow from it and the parity of the total.
 @rp2.asm_pio()
-def encoder():
+def edge_counter():
+    pull(block)               # Glitch filter loops
+    mov(x, invert(null))
+    in_(pins, 1)              # Starting level
+    mov(y, isr)
+    push(block)
+    jmp(not_y, "low")
     wrap_target()
-    mov(x, invert(null))        # x = 0xFFFFFFFF
-    label("read")
-    in_(pins, 2)                # read both encoder pins into OSR
-    mov(y, isr)                 # y = old state
-    in_(pins, 2)                # read again for current state
-    mov(isr, y)                 # swap
-    jmp(x_dec, "continue")      # dummy delay for debounce
-    label("continue")
-    irq(block)                  # signal update
-    push(noblock)               # push encoded state
+    label("high")
+    wait(0, pin, 0)
+    mov(y, osr)
+    label("fall_hold")
+    jmp(pin, "high")          # Rose again: glitch
+    jmp(y_dec, "fall_hold")
+    jmp(x_dec, "low")         # Count (falls through when x wraps)
+    label("low")
+    wait(1, pin, 0)
+    mov(y, osr)
+    label("rise_hold")
+    jmp(pin, "rise_ok")
+    jmp("low")                # Fell again: glitch
+    label("rise_ok")
+    jmp(y_dec, "rise_hold")
+    jmp(x_dec, "high")        # Count
     wrap()
 
-from machine import Pin
+EDGE_FILTER_LOOP_CYCLES = 2
+
 
-class RotaryEncoder:
-    def __init__(self, pin_a, pin_b):
-        self.pin_a = Pin(pin_a, Pin.IN, Pin.PULL_UP)
-        self.pin_b = Pin(pin_b, Pin.IN, Pin.PULL_UP)
+class EdgeCounter:
+    """Hardware count of rising, falling or both edges on one pin (SM2)."""
 
-        self.last_state = (self.pin_a.value() << 1) | self.pin_b.value()
+    EDGES = ("rising", "falling", "both")
 
-        self.position = 0
+    def __init__(self, pin_num, edge="rising", glitch_cycles=0):
+        if edge not in self.EDGES:
+            raise ValueError("edge must be 'rising', 'falling' or 'both'")
+        self.pin = Pin(pin_num, Pin.IN)
+        self.edge = edge
+        self.glitch_cycles = glitch_cycles
+        self.sm = None
+        self._start_level = 0
+        self._base = 0
+
+    def start(self):
+        if self.sm is not None:
+            return
+        self.sm = claim_sm(
+            2, edge_counter,
+            freq=config.PIO_FREQ,
+            in_base=self.pin,
+            jmp_pin=self.pin
+        )
+        self.sm.active(1)
+        self.sm.put(max(self.glitch_cycles // EDGE_FILTER_LOOP_CYCLES, 1) - 1)
+        self._start_level = self.sm.get() & 1
+        self._base = 0
 
-        self.transition_table = {
-            0b0001:  1,
-            0b0010: -1,
-            0b0100: -1,
-            0b0111:  1,
-            0b1000:  1,
-            0b1011: -1,
-            0b1101: -1,
-            0b1110:  1
-        }
+    def stop(self):
+        if self.sm is None:
+            return
+        release_sm(2)
+        self.sm = None
 
-    def read(self):
-        current_state = (self.pin_a.value() << 1) | self.pin_b.value()
+    def set_glitch_filter(self, cycles):
+        """Ignore pulses shorter than about cycles; restarts the count."""
+        self.glitch_cycles = cycles
+        self.stop()
+        self.start()
 
-        transition = (self.last_state << 2) | current_state
+    def total_edges(self):
+        """Edges of either direction since start() (wraps at 2**32)."""
+        if self.sm is None:
+            return 0
+        sm = self.sm
+        sm.exec("mov(isr, x)")
+        sm.exec("push(noblock)")
+        return 0xFFFFFFFF - sm.get()
 
-        self.last_state = current_state
+    def _count(self, total):
+        if self.edge == "both":
+            return total
+        first_is_rising = self._start_level == 0
+        if (self.edge == "rising") == first_is_rising:
+            return (total + 1) // 2
+        return total // 2
 
-        movement = self.transition_table.get(transition, 0)
+    def count(self):
+        """Edges of the selected kind since start() or the last reset()."""
+        return self._count(self.total_edges()) - self._base
 
-        self.position += movement
+    def reset(self):
+        self._base = self._count(self.total_edges())
 
-        # one full detent
-        if self.position >= 2:
-            self.position = 0
-            return 1
 
-        elif self.position <= -2:
-            self.position = 0
-            return -1
+# -----------------------------------------------------------------------------
+# Rotary Encoder (SM3)
+# -----------------------------------------------------------------------------
+# Counts the encoder entirely in the PIO, so no step is lost however long
+# the CPU is busy. Every edge of A (the `in` pin) is counted by the level of
+# B (the jmp pin): clockwise steps decrement x, anticlockwise ones y, and
+# the CPU reads both on demand like EdgeCounter. A bouncing A contact
+# counts one way then back, so bounce cancels out. x and y are preset to
+# all ones; a counter only falls through its jmp after 2**32 steps. The
+# low clock keeps B sampled a few microseconds after the A edge. Exactly
+# 8 instructions, the space PIO0 has left beside SM0 and SM2.
+ENCODER_PIO_FREQ = 100_000
 
-        return 0
+@rp2.asm_pio()
+def encoder():
+    wrap_target()
+    label("low")
+    wait(1, pin, 0)             # A rose
+    jmp(pin, "rose_ccw")
+    jmp(x_dec, "high")          # B low: clockwise
+    label("rose_ccw")
+    jmp(y_dec, "high")
+    label("high")
+    wait(0, pin, 0)             # A fell
+    jmp(pin, "fell_cw")
+    jmp(y_dec, "low")           # B low: anticlockwise
+    label("fell_cw")
+    jmp(x_dec, "low")
+    wrap()
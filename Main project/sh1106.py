@@ -1,5 +1,53 @@
 from machine import Pin, I2C
 import framebuf
+import micropython
+import uasyncio
+
+# The SH1106 has 132 columns of RAM; a 128 pixel panel is centred in it.
+COL_OFFSET = 2
+
+# Columns per data transaction. Changes are tracked at this granularity so
+# every transfer can reuse a preallocated memoryview of the framebuffer.
+CHUNK = 16
+
+# Control byte 0x00 = "all following bytes are commands", sent as one write
+INIT_SEQ = bytes((
+    0x00,
+    0xAE,
+    0xD5, 0x80,
+    0xA8, 0x3F,
+    0xD3, 0x00,
+    0x40,
+    0xA1,
+    0xC8,
+    0xDA, 0x12,
+    0x81, 0xCF,
+    0xD9, 0xF1,
+    0xDB, 0x40,
+    0xA4,
+    0xA6,
+    0xAF,
+))
+
+# Control byte for a run of display data
+DATA_PREFIX = b'\x40'
+
+
+@micropython.viper
+def _sync_chunk(buf, shadow, start: int, n: int) -> int:
+    """Copy buf[start:start+n] into shadow, returning 1 if anything differed."""
+    src = ptr8(buf)
+    dst = ptr8(shadow)
+    changed = 0
+    i = start
+    end = start + n
+    while i < end:
+        if src[i] != dst[i]:
+            dst[i] = src[i]
+            changed = 1
+        i += 1
+    return changed
+
 
 class SH1106_I2C(framebuf.FrameBuffer):
     def __init__(self, width, height, i2c, addr=0x3c):
@@ -10,50 +58,153 @@ class SH1106_I2C(framebuf.FrameBuffer):
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
 
+        # Copy of what the panel currently shows, used to find changed columns
+        self._shadow = bytearray(len(self.buffer))
+        self._full_refresh = True
+
+        # Pages marked by mark_dirty() since the last frame (bit per page)
+        self._all_pages = (1 << self.pages) - 1
+        self._dirty_pages = 0
+
+        # Bytes put on the bus (control bytes included) by the last show()
+        # and since power-up, to check how much the dirty tracking saves.
+        self.frame_bytes = 0
+        self.total_bytes = 0
+
+        # Set by request_show() to wake refresh_task()
+        self._frame_pending = uasyncio.Event()
+
+        # Everything a refresh writes is allocated here, once.
+        self._cmd = bytearray(2)
+        self._cmd[0] = 0x80
+        self._page_cmd = bytearray(4)   # 0x00, page, column low, column high
+        mv = memoryview(self.buffer)
+        self._chunks = [mv[i:i + CHUNK] for i in range(0, len(self.buffer), CHUNK)]
+        if hasattr(i2c, "writevto"):
+            # Scatter write: control byte and framebuffer slice in one transaction
+            self._vecs = [(DATA_PREFIX, chunk) for chunk in self._chunks]
+        else:
+            self._vecs = None
+            self._tx = bytearray(CHUNK + 1)
+            self._tx[0] = DATA_PREFIX[0]
+
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
 
         self.init_display()
 
+    def _write(self, data):
+        self.i2c.writeto(self.addr, data)
+        self.frame_bytes += len(data)
+        self.total_bytes += len(data)
+
     def write_cmd(self, cmd):
-        self.i2c.writeto(self.addr, bytearray([0x80, cmd]))
+        self._cmd[1] = cmd
+        self._write(self._cmd)
 
     def init_display(self):
-        cmds = [
-            0xAE,
-            0xD5, 0x80,
-            0xA8, 0x3F,
-            0xD3, 0x00,
-            0x40,
-            0xA1,
-            0xC8,
-            0xDA, 0x12,
-            0x81, 0xCF,
-            0xD9, 0xF1,
-            0xDB, 0x40,
-            0xA4,
-            0xA6,
-            0xAF
-        ]
-
-        for cmd in cmds:
-            self.write_cmd(cmd)
+        self._write(INIT_SEQ)
+
+        # Panel RAM is undefined after power-up, so the next show() sends everything
+        self.invalidate()
+
+    def invalidate(self):
+        """Force the next show() to resend the whole frame."""
+        self._full_refresh = True
+
+    def _set_cursor(self, page, col):
+        cmd = self._page_cmd
+        col += COL_OFFSET
+        cmd[1] = 0xB0 | page
+        cmd[2] = col & 0x0F
+        cmd[3] = 0x10 | (col >> 4)
+        self._write(cmd)
+
+    def _write_chunk(self, index):
+        if self._vecs is not None:
+            self.i2c.writevto(self.addr, self._vecs[index])
+        else:
+            self._tx[1:] = self._chunks[index]
+            self.i2c.writeto(self.addr, self._tx)
+        self.frame_bytes += CHUNK + 1
+        self.total_bytes += CHUNK + 1
+
+    def _show_page(self, page, full):
+        """Send the changed chunks of one page (all of them if full)."""
+        per_page = self.width // CHUNK
+        first = page * per_page
+        next_col = -1
+
+        for index in range(first, first + per_page):
+            changed = _sync_chunk(self.buffer, self._shadow, index * CHUNK, CHUNK)
+            if not (changed or full):
+                continue
+
+            # The column pointer auto-increments, so consecutive chunks
+            # only need the cursor set once.
+            col = (index - first) * CHUNK
+            if col != next_col:
+                self._set_cursor(page, col)
+            self._write_chunk(index)
+            next_col = col + CHUNK
+
+    def mark_dirty(self, y, h):
+        """Limit the next frame to the pages covering rows y..y+h-1.
+
+        Optional: without any marks the next frame checks every page.
+        """
+        first = max(y, 0) >> 3
+        last = min(y + h - 1, self.height - 1) >> 3
+        for page in range(first, last + 1):
+            self._dirty_pages |= 1 << page
+
+    def _take_dirty(self):
+        pages = self._dirty_pages or self._all_pages
+        self._dirty_pages = 0
+        return pages
 
     def show(self):
+        self.frame_bytes = 0
+        full = self._full_refresh
+        self._full_refresh = False
+        pages = self._all_pages if full else self._take_dirty()
+
         for page in range(self.pages):
-            self.write_cmd(0xB0 + page)
+            if pages & (1 << page):
+                self._show_page(page, full)
 
-            # column offset
-            self.write_cmd(0x02)
-            self.write_cmd(0x10)
+    def request_show(self):
+        """Ask refresh_task() to push the current framebuffer."""
+        self._frame_pending.set()
 
-            start = self.width * page
-            end = start + self.width
+    async def refresh_task(self):
+        """Push requested frames one page at a time, yielding between pages.
 
-            # get page slice
-            page_buf = self.buffer[start:end]
+        The pages are diffed against the live framebuffer, so a frame that is
+        requested while another is in flight supersedes it: the pass restarts
+        from the next page and the stale remainder is never sent.
+        """
+        page = 0
+        while True:
+            await self._frame_pending.wait()
+            self._frame_pending.clear()
+            self.frame_bytes = 0
+            full = self._full_refresh
+            self._full_refresh = False
+            pages = self._all_pages if full else self._take_dirty()
 
-            # send in chunks to avoid I2C timeout
-            for i in range(0, self.width, 16):
-                chunk = page_buf[i:i+16]
-                self.i2c.writeto(self.addr, b'\x40' + chunk)
+            remaining = self.pages
+            while remaining:
+                if pages & (1 << page):
+                    self._show_page(page, full)
+                    await uasyncio.sleep_ms(0)
+                page = (page + 1) % self.pages
+                remaining -= 1
 
+                if self._frame_pending.is_set():
+                    # Newer frame: start a fresh pass from where we are
+                    self._frame_pending.clear()
+                    self.frame_bytes = 0
+                    full = full or self._full_refresh
+                    self._full_refresh = False
+                    pages = self._all_pages if full else pages | self._take_dirty()
+                    remaining = self.pages
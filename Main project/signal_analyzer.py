@@ -1,60 +1,174 @@
 from machine import Pin, ADC
-from pio_based_helpers import PrecisionPulse, EdgeTimer, FrequencyMeasure
+from pio_based_helpers import PrecisionPulse, EdgeTimer, AutoFrequency, DutyCycleMeasure, PulseStats
+from capture import TransitionCapture, EdgeStream, GlitchDetector
+from decoders import UartDecoder
+from analog import AdcBlockSampler
 import config
 
+
+class UartMonitor:
+    """Live UART decode: edge-interval capture feeding a UartDecoder."""
+
+    def __init__(self, pin_num, baud, keep=8):
+        self._capture = TransitionCapture(pin_num)
+        self.baud = baud
+        self.recent = bytearray(keep)   # Last bytes, oldest first
+        self.count = 0
+        self.errors = 0
+        self._stream = None
+        self._decoder = None
+
+    def start(self):
+        if self._capture.running():
+            return
+        self._capture.arm()
+        self._stream = EdgeStream()
+        self._decoder = UartDecoder(
+            self.baud, config.UART_DATA_BITS, config.UART_PARITY, config.UART_STOP_BITS
+        )
+
+    def stop(self):
+        self._capture.stop()
+
+    def _add(self, frames):
+        recent = self.recent
+        for _, value, errors in frames:
+            recent[:-1] = recent[1:]
+            recent[-1] = value
+            self.count += 1
+            if errors:
+                self.errors += 1
+
+    def poll(self):
+        """Decode the edges captured since the last call."""
+        self.start()
+        capture = self._capture
+        now = capture.elapsed_ns()
+        captured = capture.edges_captured()
+        if captured - self._stream.index > capture.depth or capture.exhausted():
+            # The ring lapped unread words: start afresh (a frame in flight is lost)
+            capture.stop()
+            self.start()
+            return
+
+        edges = self._stream.edges(capture.words, captured)
+        self._add(self._decoder.decode(edges))
+        # The line has held its level since the last edge: finish any frame
+        # whose remaining bits are all in the past
+        self._add(self._decoder.advance(now))
+
 class SignalAnalyzer:
     def __init__(self, pin_num):
         self.pin = Pin(pin_num, Pin.IN)
         self.adc = ADC(config.ADC_PIN)
+        self._analog = AdcBlockSampler(
+            config.ADC_PIN, config.ADC_BLOCK_SAMPLES, config.ADC_RATE_HZ
+        )
         # PIO-based measurements
         self._pulse = PrecisionPulse(pin_num)
         self._edge = EdgeTimer(pin_num)
-        self._freq = FrequencyMeasure(pin_num)
+        self._freq = AutoFrequency(pin_num)
+        self._duty = DutyCycleMeasure(pin_num)
+        self._pulse_stats = PulseStats(pin_num)
+        self._uart = UartMonitor(pin_num, config.UART_BAUD)
+        self._glitch = GlitchDetector(pin_num, config.GLITCH_MAX_CYCLES, config.GLITCH_LEVEL)
+
+        # Background measurement currently holding a state machine
+        self._active = None
+
+    def _use(self, engine):
+        """Start engine, stopping whichever background measurement ran before."""
+        if self._active is not engine:
+            if self._active is not None:
+                self._active.stop()
+            self._active = engine
+        engine.start()
+
+    def stop(self):
+        """Stop the background measurement and free its state machines."""
+        if self._active is not None:
+            self._active.stop()
+            self._active = None
 
 
     def pulse_width_us(self, samples=15):
         """Measure high pulse width in microseconds."""
         return self._pulse.measure(samples)
 
+    def pulse_stats(self, window_ms=50):
+        """Fold window_ms more pulses into the running HIGH/LOW width stats.
+
+        The window starts when pulse stats take over the state machine.
+        Returns (high, low), each (count, min, mean, max, stdev) in us.
+        """
+        self._use(self._pulse_stats)
+        self._pulse_stats.collect(window_ms)
+        return self._pulse_stats.summary()
+
     def rise_fall_times_ns(self, samples=15):
         """Measure rise and fall times in nanoseconds."""
+        self._use(self._edge)
         return self._edge.measure(samples)
 
-    def frequency(self, sample_time_ms=100):
-        """Return frequency in Hz."""
-        _, freq_hz, _ = self._freq.measure(sample_time_ms)
-        return freq_hz
+    def edge_times(self, window_ms=50):
+        """Fold window_ms more periods into the HIGH/LOW time stats.
+
+        Returns (high, low), each (count, min, mean, max, stdev) in ns.
+        """
+        self._use(self._edge)
+        self._edge.collect(window_ms)
+        return self._edge.summary()
 
-    def period_ns(self, sample_time_ms=100):
+    def frequency(self):
+        """Return the latest frequency in Hz (gated or reciprocal by rate)."""
+        self._use(self._freq)
+        return self._freq.frequency()
+
+    def period_ns(self):
         """Return period in nanoseconds."""
-        period_ns, _, _ = self._freq.measure(sample_time_ms)
+        self._use(self._freq)
+        period_ns, _, _ = self._freq.measure()
         return period_ns
 
     # Edge Count not currently in use
-    def edge_count(self, sample_time_ms=100):
-        """Return number of edges counted during the sample time."""
-        _, _, edges = self._freq.measure(sample_time_ms)
+    def edge_count(self):
+        """Return number of rising edges counted in the latest gate."""
+        self._use(self._freq)
+        _, _, edges = self._freq.measure()
         return edges
 
-    def duty_cycle(self, pulse_samples=10, freq_sample_time_ms=100):
-        """Calculate duty cycle (%) and frequency (Hz)."""
-        pw_us = self.pulse_width_us(pulse_samples)
-        period_ns, freq_hz, _ = self._freq.measure(freq_sample_time_ms)
-
-        if period_ns == 0:
-            return 0.0, 0.0
-        
-        duty = (pw_us * 1000) / period_ns * 100  # Convert us -> ns
+    def duty_cycle(self, periods=4):
+        """Calculate duty cycle (%) and frequency (Hz) from one capture."""
+        self._use(self._duty)
+        duty, freq_hz = self._duty.measure(periods)
         return round(duty, 1), freq_hz
     
-    def voltage(self, samples=16):
-        total = 0
-
-        for _ in range(samples):
-            total += self.adc.read_u16()
-
-        raw = total / samples
-        return round((raw / 65535) * config.VREF, 2)
+    def uart(self):
+        """Return (last bytes, bytes decoded, frames with errors)."""
+        self._use(self._uart)
+        self._uart.poll()
+        return self._uart.recent, self._uart.count, self._uart.errors
+
+    def glitches(self):
+        """Return (count, shortest_ns, [(ticks_us, width_ns), ...] newest first)."""
+        self._use(self._glitch)
+        recent = self._glitch.recent()
+        return self._glitch.count(), self._glitch.shortest_ns, recent
+
+    def voltage(self):
+        """Mean voltage over one ADC block."""
+        self.stop()   # Nothing on the PIO is needed while block sampling
+        return round(self._analog.envelope()[0], 2)
+
+    def voltage_envelope(self):
+        """Return (mean, min, max, peak_to_peak, rms) in volts over one ADC block."""
+        self.stop()
+        return self._analog.envelope()
+
+    def scope(self, cols=128):
+        """Return (trace, vmin, vmax, window_us) of one triggered ADC block."""
+        self.stop()
+        return self._analog.trace(cols)
 
     def voltage_state(self, voltage=None):
         if voltage is None:
@@ -0,0 +1,150 @@
+# stats.py — Running statistics over PIO counter streams
+#
+# Floats are heap objects on the RP2040 port, so folding samples into a
+# float mean/variance allocates on every sample. Instead each stream keeps
+# exact integer moments in a small array('I'): samples are shifted by the
+# first value seen (keeping the sums small, as in Welford's method) and
+# summed into 64-bit accumulators held as 32-bit halves. The viper fold
+# never allocates; mean and variance are only computed when read.
+import micropython
+from array import array
+
+# State words
+_COUNT = 0
+_MIN = 1
+_MAX = 2
+_REF = 3      # First sample, subtracted from every value
+_SUM_LO = 4   # Sum of (x - ref), 64-bit two's complement
+_SUM_HI = 5
+_SQ_LO = 6    # Sum of (x - ref)^2, 64-bit unsigned
+_SQ_HI = 7
+_WORDS = 8
+
+
+@micropython.viper
+def _fold(state: ptr32, words: ptr32, start: int, stop: int, step: int):
+    count = uint(state[0])
+    vmin = uint(state[1])
+    vmax = uint(state[2])
+    ref = uint(state[3])
+    s_lo = uint(state[4])
+    s_hi = uint(state[5])
+    q_lo = uint(state[6])
+    q_hi = uint(state[7])
+
+    if count == 0 and start < stop:
+        ref = uint(words[start])
+        vmin = ref
+        vmax = ref
+
+    i = start
+    while i < stop:
+        x = uint(words[i])
+        i += step
+        count += 1
+        if x < vmin:
+            vmin = x
+        if x > vmax:
+            vmax = x
+
+        # Signed deviation from ref, added to the 64-bit sum
+        if x >= ref:
+            a = x - ref
+            s_lo += a
+            if s_lo < a:
+                s_hi += 1
+        else:
+            a = ref - x
+            if s_lo < a:
+                s_hi -= 1
+            s_lo -= a
+
+        # a * a as 64 bits from 16-bit halves
+        al = a & 0xFFFF
+        ah = a >> 16
+        mid = ah * al
+        p_lo = al * al
+        t = mid << 17             # 2 * mid << 16, low word
+        p_lo += t
+        p_hi = ah * ah + (mid >> 15)
+        if p_lo < t:
+            p_hi += 1
+
+        q_lo += p_lo
+        if q_lo < p_lo:
+            q_hi += 1
+        q_hi += p_hi
+
+    state[0] = count
+    state[1] = vmin
+    state[2] = vmax
+    state[3] = ref
+    state[4] = s_lo
+    state[5] = s_hi
+    state[6] = q_lo
+    state[7] = q_hi
+
+
+class RunningStats:
+    """Count, min, max, mean and standard deviation of a stream of counts."""
+
+    def __init__(self):
+        self._state = array("I", bytes(4 * _WORDS))
+
+    def reset(self):
+        state = self._state
+        for i in range(_WORDS):
+            state[i] = 0
+
+    def fold(self, words, start=0, stop=None, step=1):
+        """Add words[start:stop:step] (an array('I')) to the statistics.
+
+        The square sum wraps after about 2**64 / deviation**2 samples, far
+        beyond any window of steady pulses.
+        """
+        if stop is None:
+            stop = len(words)
+        _fold(self._state, words, start, stop, step)
+
+    @property
+    def count(self):
+        return self._state[_COUNT]
+
+    def _sums(self):
+        state = self._state
+        total = state[_SUM_HI] << 32 | state[_SUM_LO]
+        if total >= 1 << 63:
+            total -= 1 << 64
+        return total, state[_SQ_HI] << 32 | state[_SQ_LO]
+
+    def mean(self):
+        n = self.count
+        if not n:
+            return 0.0
+        total, _ = self._sums()
+        return self._state[_REF] + total / n
+
+    def variance(self):
+        """Population variance, from exact integer sums."""
+        n = self.count
+        if not n:
+            return 0.0
+        total, squares = self._sums()
+        return (squares * n - total * total) / (n * n)
+
+    def stdev(self):
+        return self.variance() ** 0.5
+
+    def summary(self, scale=1.0):
+        """Return (count, min, mean, max, stdev), values multiplied by scale."""
+        n = self.count
+        if not n:
+            return 0, 0.0, 0.0, 0.0, 0.0
+        state = self._state
+        return (
+            n,
+            state[_MIN] * scale,
+            self.mean() * scale,
+            state[_MAX] * scale,
+            self.stdev() * scale,
+        )
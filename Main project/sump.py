@@ -0,0 +1,233 @@
+# sump.py — SUMP / Openbench Logic Sniffer server over USB serial
+#
+# Lets sigrok/PulseView (driver "ols") use the probe as a capture front-end.
+# The server talks to any reader with readexactly() and writer with write()
+# and drain(), so it can be exercised against a pty or socketpair; on the
+# probe serve_usb() wires it to the USB CDC stdio.
+import uasyncio
+
+# Short commands
+CMD_RESET = 0x00
+CMD_RUN = 0x01
+CMD_ID = 0x02
+CMD_METADATA = 0x04
+CMD_XON = 0x11
+CMD_XOFF = 0x13
+
+# Long commands (followed by 4 argument bytes, little endian)
+CMD_TRIGGER_MASK = 0xC0
+CMD_TRIGGER_VALUE = 0xC1
+CMD_TRIGGER_CONFIG = 0xC2
+CMD_DIVIDER = 0x80
+CMD_READ_DELAY = 0x81
+CMD_FLAGS = 0x82
+CMD_DELAY_COUNT = 0x83
+CMD_READ_COUNT = 0x84
+
+SUMP_CLOCK = 100_000_000   # Divider reference used by the protocol
+MIN_RATE = 2_000           # Slowest the PIO clock divider reaches
+MAX_RATE = 100_000_000
+FLAG_GROUPS_SHIFT = 2      # Bits 2-5 disable channel groups 0-3
+
+BLOCK = 512                # Bytes per bulk write
+
+
+def _meta_u32(key, value):
+    return bytes((key, value >> 24 & 0xFF, value >> 16 & 0xFF, value >> 8 & 0xFF, value & 0xFF))
+
+
+class SumpServer:
+    """Answers SUMP commands and streams captures from a LogicCapture.
+
+    A run is a separate task, so commands are still read while it waits for
+    its trigger: a reset (the client's Stop) cancels it and sends nothing.
+    """
+
+    def __init__(self, reader, writer, capture, name="LogicProbe"):
+        self.reader = reader
+        self.writer = writer
+        self.capture = capture
+        self.name = name
+        self.capacity = capture.depth * capture.samples_per_word
+        self._block = bytearray(BLOCK)
+        self._run = None
+        self.reset()
+
+    def _cancel_run(self):
+        if self._run is not None:
+            self._run.cancel()
+            self._run = None
+        self.capture.stop()
+
+    def reset(self):
+        self._cancel_run()
+        self.rate = MAX_RATE
+        self.read_count = self.capacity
+        self.trigger_mask = 0
+        self.trigger_value = 0
+        self.groups = 1
+
+    def metadata(self):
+        return b"".join((
+            b"\x01", self.name.encode(), b"\x00",
+            b"\x02", b"1.0", b"\x00",
+            _meta_u32(0x20, self.capture.channels),
+            _meta_u32(0x21, self.capacity),
+            _meta_u32(0x23, MAX_RATE),
+            _meta_u32(0x24, 2),
+            b"\x00",
+        ))
+
+    def _long(self, cmd, arg):
+        if cmd == CMD_DIVIDER:
+            rate = SUMP_CLOCK // ((arg & 0xFFFFFF) + 1)
+            self.rate = min(max(rate, MIN_RATE), MAX_RATE)
+        elif cmd == CMD_READ_DELAY:
+            self.read_count = ((arg & 0xFFFF) + 1) * 4
+        elif cmd == CMD_READ_COUNT:
+            self.read_count = arg * 4
+        elif cmd == CMD_FLAGS:
+            disabled = (arg >> FLAG_GROUPS_SHIFT) & 0xF
+            self.groups = max(1, 4 - bin(disabled).count("1"))
+        elif cmd == CMD_TRIGGER_MASK:
+            self.trigger_mask = arg
+        elif cmd == CMD_TRIGGER_VALUE:
+            self.trigger_value = arg
+        # Later trigger stages, trigger config and delay count are accepted
+        # but not used: the capture starts at the trigger.
+
+    def _trigger(self):
+        # The PIO trigger watches the first channel only
+        if self.trigger_mask & 1:
+            return self.trigger_value & 1
+        return None
+
+    async def run_capture(self):
+        capture = self.capture
+        samples = min(self.read_count, self.capacity)
+        words = -(-samples // capture.samples_per_word)
+
+        # One-shot: the DMA stops after `words`, so the samples following
+        # the trigger are still there however long this task takes to run
+        capture.arm(self.rate, self._trigger(), words)
+        await capture.wait()
+        capture.stop()
+        await self._send(samples)
+        self._run = None
+
+    async def _flush(self, fill):
+        self.writer.write(memoryview(self._block)[:fill])
+        await self.writer.drain()
+
+    async def _send(self, samples):
+        """Stream samples newest first, as SUMP expects, in bulk blocks."""
+        capture = self.capture
+        older, newer = capture.read()
+        channels = capture.channels
+        per_word = capture.samples_per_word
+        mask = (1 << channels) - 1
+        groups = self.groups
+        block = self._block
+        fill = 0
+        remaining = samples
+        # The last word may run past the requested count: drop its newest
+        # samples, not the ones right after the trigger
+        skip = max((len(older) + len(newer)) * per_word - samples, 0)
+
+        for view in (newer, older):
+            i = len(view) - 1
+            while i >= 0 and remaining:
+                word = view[i]
+                shift = (per_word - 1) * channels
+                while skip and shift >= 0:
+                    skip -= 1
+                    shift -= channels
+                while shift >= 0 and remaining:
+                    block[fill] = (word >> shift) & mask
+                    for g in range(1, groups):
+                        block[fill + g] = 0
+                    fill += groups
+                    remaining -= 1
+                    shift -= channels
+                    if fill + groups > BLOCK:
+                        await self._flush(fill)
+                        fill = 0
+                i -= 1
+
+        # Capture shorter than requested: pad so the client's count matches
+        while remaining:
+            for g in range(groups):
+                block[fill + g] = 0
+            fill += groups
+            remaining -= 1
+            if fill + groups > BLOCK:
+                await self._flush(fill)
+                fill = 0
+
+        if fill:
+            await self._flush(fill)
+
+    async def handle(self, cmd):
+        """Process one command byte (reading its arguments if it has any)."""
+        if cmd & 0x80:
+            arg = await self.reader.readexactly(4)
+            self._long(cmd, arg[0] | arg[1] << 8 | arg[2] << 16 | arg[3] << 24)
+        elif cmd == CMD_RESET:
+            self.reset()
+        elif cmd == CMD_ID:
+            self.writer.write(b"1ALS")
+            await self.writer.drain()
+        elif cmd == CMD_METADATA:
+            self.writer.write(self.metadata())
+            await self.writer.drain()
+        elif cmd == CMD_RUN:
+            self._cancel_run()
+            self._run = uasyncio.create_task(self.run_capture())
+        # XON/XOFF and unknown short commands are ignored
+
+    async def serve(self):
+        while True:
+            data = await self.reader.readexactly(1)
+            await self.handle(data[0])
+
+
+class _StdoutWriter:
+    """Raw (uncooked) binary writes to the USB CDC stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        self.stream.write(data)
+
+    async def drain(self):
+        await uasyncio.sleep_ms(0)
+
+
+class _UsbServer(SumpServer):
+    """Ctrl-C is off from a client's ID command until its next reset.
+
+    0x03 bytes in command arguments would otherwise interrupt main.py. The
+    client's Stop and disconnect both send resets, which give Ctrl-C back
+    to the REPL tools.
+    """
+
+    async def handle(self, cmd):
+        import micropython
+        if cmd == CMD_ID:
+            micropython.kbd_intr(-1)
+        elif cmd == CMD_RESET:
+            micropython.kbd_intr(3)
+        await super().handle(cmd)
+
+
+async def serve_usb():
+    """Run the SUMP server on USB serial with the configured capture pins."""
+    import sys
+    import config
+    from capture import LogicCapture
+
+    capture = LogicCapture(config.CAPTURE_BASE_PIN, config.CAPTURE_CHANNELS)
+    reader = uasyncio.StreamReader(sys.stdin.buffer)
+    writer = _StdoutWriter(sys.stdout.buffer)
+    await _UsbServer(reader, writer, capture).serve()